@@ -0,0 +1,147 @@
+"""batch
+
+Description
+===============================
+
+This Python module solves many scrambles without opening a window.
+Each line of the input is a string of move letters, and each line of
+the output is a JSON object with the solution to that scramble.
+
+    python batch.py scrambles.txt -o solutions.jsonl --workers 4
+
+Reading from standard input and writing to standard output is the
+default, and the input is read in chunks so memory use stays bounded
+however long it is.
+
+Copyright and Usage Information
+===============================
+
+This file is Copyright (c) 2021 Caleb Sadler.
+"""
+from __future__ import annotations
+from functools import partial
+from itertools import islice
+from typing import Iterator, TextIO
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+import optimal
+import search
+import state
+
+# Scrambles handed to each worker at a time
+CHUNK_SIZE = 64
+
+# Seconds the search may take for each scramble when there is no distance table
+SEARCH_BUDGET = 60.0
+
+
+def uses_table(method: str) -> bool:
+    """Return whether scrambles are solved with the distance table by the given method"""
+    return method == 'table' or (method == 'auto' and optimal.has_table())
+
+
+def warm_up(method: str) -> None:
+    """Build the move tables, and open the distance table if the method uses it
+
+    Each worker does this when it starts, so the time of its first scramble does
+    not include them.
+    """
+    state.move_tables()
+    optimal.face_tables()
+    if uses_table(method):
+        optimal.distance(state.SOLVED)
+
+
+def solve_scramble(scramble: str, method: str = 'auto') -> dict:
+    """Return a record of the solution to the given scramble
+
+    method is 'table' to use the distance table, 'search' to use the search
+    without a table, or 'auto' to use the table if it has been generated.
+    """
+    if any(move not in state.MOVES for move in scramble):
+        return {'scramble': scramble, 'error': 'unknown move letter'}
+
+    start = time.perf_counter()
+    current = state.SOLVED.apply_sequence(scramble)
+
+    if uses_table(method):
+        solution = optimal.solve(current)
+    else:
+        solution = search.solve(current, SEARCH_BUDGET)
+
+    seconds = time.perf_counter() - start
+
+    if solution is None:
+        return {'scramble': scramble, 'error': 'no solution found in time', 'time': seconds}
+
+    return {'scramble': scramble, 'solution': solution, 'length': len(solution),
+            'time': seconds}
+
+
+def read_scrambles(file: TextIO) -> Iterator[str]:
+    """Yield each scramble in the file, skipping blank lines"""
+    for line in file:
+        scramble = line.strip()
+        if scramble != '':
+            yield scramble
+
+
+def solve_all(in_file: TextIO, out_file: TextIO, workers: int, method: str) -> int:
+    """Write the solution of every scramble in in_file to out_file, returning how many
+
+    The scrambles are solved in batches, so only a few batches are ever in memory.
+    """
+    scrambles = read_scrambles(in_file)
+    solve = partial(solve_scramble, method=method)
+    count = 0
+
+    with multiprocessing.Pool(workers, initializer=warm_up, initargs=(method,)) as pool:
+        batch = list(islice(scrambles, CHUNK_SIZE * workers * 4))
+
+        while batch != []:
+            for record in pool.imap(solve, batch, chunksize=CHUNK_SIZE):
+                out_file.write(json.dumps(record) + '\n')
+                count += 1
+
+            batch = list(islice(scrambles, CHUNK_SIZE * workers * 4))
+
+    return count
+
+
+def main(args: list[str]) -> None:
+    """Run the batch solver with the given command line arguments"""
+    parser = argparse.ArgumentParser(description="Solve a file of 2 by 2 Rubik's cube "
+                                                 "scrambles, one per line.")
+    parser.add_argument('input', nargs='?', default='-',
+                        help='file of scrambles, or - for standard input')
+    parser.add_argument('-o', '--output', default='-',
+                        help='file to write JSON lines to, or - for standard output')
+    parser.add_argument('-w', '--workers', type=int, default=multiprocessing.cpu_count(),
+                        help='number of processes to solve with')
+    parser.add_argument('-m', '--method', choices=['auto', 'table', 'search'], default='auto',
+                        help='solve with the distance table, the search, or the table if '
+                             'it has been generated')
+    options = parser.parse_args(args)
+
+    if options.method == 'table' and not optimal.has_table():
+        print(f'Generating the distance table at {optimal.TABLE_PATH}, which takes a while '
+              f'and only needs to be done once...', file=sys.stderr)
+        optimal.generate_table()
+
+    in_file = sys.stdin if options.input == '-' else open(options.input)
+    out_file = sys.stdout if options.output == '-' else open(options.output, 'w')
+
+    try:
+        solve_all(in_file, out_file, max(options.workers, 1), options.method)
+    finally:
+        if in_file is not sys.stdin:
+            in_file.close()
+        if out_file is not sys.stdout:
+            out_file.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,170 @@
+"""benchmark
+
+Description
+===============================
+
+This Python module times the calculations the cube does every
+frame, so that changes to them can be measured.
+
+Every benchmark starts from the same seeded scrambles, so results are
+comparable between runs. They can be saved as a baseline, and later
+runs fail if any benchmark has become slower than the baseline by more
+than a threshold:
+
+    python benchmark.py --save      # record the baseline
+    python benchmark.py             # compare against it
+
+Copyright and Usage Information
+===============================
+
+This file is Copyright (c) 2021 Caleb Sadler.
+"""
+from __future__ import annotations
+from itertools import cycle
+from math import pi
+from typing import Callable
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+import pygame
+import interaction
+import state
+from cube import Cube
+
+# Where the baseline results are saved
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# How much slower than the baseline a benchmark may be before it fails, as a fraction
+THRESHOLD = 0.25
+
+# Seed of the random scrambles used by the benchmarks
+SEED = 2021
+
+SCREEN_SIZE = (1000, 600)
+
+
+def time_call(function: Callable[[], object], number: int = 1000, rounds: int = 5) -> float:
+    """Return the fastest time in microseconds of one call to function over several rounds"""
+    return min(timeit.repeat(function, number=number, repeat=rounds)) / number * 1e6
+
+
+def make_cubes(count: int, seed: int = SEED) -> list[Cube]:
+    """Return count cubes, each scrambled with 40 random moves from the given seed"""
+    rand = random.Random(seed)
+    cubes = []
+
+    for _ in range(0, count):
+        cube = Cube((SCREEN_SIZE[0] / 2, SCREEN_SIZE[1] / 2, 0), 70)
+        scramble = ''.join(rand.choice(state.MOVES) for _ in range(0, 40))
+        cube.set_state(state.SOLVED.apply_sequence(scramble))
+        cubes.append(cube)
+
+    return cubes
+
+
+def bench_geometry() -> dict[str, float]:
+    """Return the time in microseconds of each geometry calculation done in a frame"""
+    cube = make_cubes(1)[0]
+    solved_cube = Cube((SCREEN_SIZE[0] / 2, SCREEN_SIZE[1] / 2, 0), 70)
+
+    def turn_frame() -> None:
+        """Animate one frame of a turn"""
+        cube.relative_rotation(pi / 500, 1)
+        cube.update_points()
+
+    def view_frame() -> None:
+        """Animate one frame of turning the view"""
+        cube.rotate_x(pi / 500)
+        cube.update_points()
+
+    return {
+        'relative_rotation': time_call(turn_frame),
+        'view_frame': time_call(view_frame),
+        'update_corners': time_call(lambda: cube.update_corners(1)),
+        'check_solve': time_call(solved_cube.check_solve)  # solved is the slowest to check
+    }
+
+
+def bench_drawing() -> dict[str, float]:
+    """Return the time in microseconds of drawing the cube to an offscreen surface"""
+    cube = make_cubes(1)[0]
+    screen = pygame.Surface(SCREEN_SIZE)
+
+    def draw_frame() -> None:
+        """Draw one frame of turning the view"""
+        cube.rotate_y(pi / 500)
+        cube.visualize(screen)
+
+    return {'visualize': time_call(draw_frame, number=200)}
+
+
+def bench_solving() -> dict[str, float]:
+    """Return the time in microseconds of finding the next steps of a solve"""
+    random.seed(SEED)  # get_solve picks some of its steps randomly
+    cubes = cycle(make_cubes(10))
+    solved_cube = Cube((SCREEN_SIZE[0] / 2, SCREEN_SIZE[1] / 2, 0), 70)
+
+    return {'get_solve': time_call(lambda: interaction.get_solve(next(cubes), solved_cube))}
+
+
+def run_all() -> dict[str, float]:
+    """Return the time in microseconds of every benchmark"""
+    results = {}
+    results.update(bench_geometry())
+    results.update(bench_drawing())
+    results.update(bench_solving())
+
+    return results
+
+
+def find_regressions(results: dict[str, float], baseline: dict[str, float],
+                     threshold: float = THRESHOLD) -> list[str]:
+    """Return the names of the benchmarks that are slower than the baseline by more than
+    threshold"""
+    return [name for name in results
+            if name in baseline and results[name] > baseline[name] * (1 + threshold)]
+
+
+def run_benchmarks(args: list[str]) -> int:
+    """Print the time of each benchmark, returning 1 if any have regressed and 0 otherwise"""
+    parser = argparse.ArgumentParser(description='Time the hot paths of the cube.')
+    parser.add_argument('--save', action='store_true',
+                        help='save the results as the new baseline')
+    parser.add_argument('--baseline', default=BASELINE_PATH,
+                        help='file the baseline is saved in')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='fraction slower than the baseline that counts as a regression')
+    options = parser.parse_args(args)
+
+    results = run_all()
+    baseline = {}
+
+    if not options.save and os.path.isfile(options.baseline):
+        with open(options.baseline) as file:
+            baseline = json.load(file)
+
+    for name, micros in results.items():
+        if name in baseline:
+            change = (micros / baseline[name] - 1) * 100
+            print(f'{name:<20} {micros:10.2f} us  {change:+7.1f}% vs baseline')
+        else:
+            print(f'{name:<20} {micros:10.2f} us')
+
+    if options.save:
+        with open(options.baseline, 'w') as file:
+            json.dump(results, file, indent=4)
+        print(f'Saved baseline to {options.baseline}')
+        return 0
+
+    regressions = find_regressions(results, baseline, options.threshold)
+    for name in regressions:
+        print(f'{name} is more than {options.threshold:.0%} slower than the baseline')
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run_benchmarks(sys.argv[1:]))
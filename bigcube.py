@@ -0,0 +1,381 @@
+"""bigcube
+
+Description
+===============================
+
+This Python module is a Rubik's cube of any size. Rather than
+following each piece like the 2 by 2 cube in cube.py, it stores the
+colour of every sticker, and each move is a permutation of the
+stickers. The permutations are worked out from the geometry of the
+cube the first time a layer is turned, so moving a 7 by 7 cube costs
+the same single array lookup as moving a 2 by 2 cube.
+
+The cube turns around the same axes as the cube in cube.py, so it can
+be drawn and turned by the same code. Any layer can be turned around
+each axis, counting inwards from the face that axis turns, so every
+position of the cube can be reached. The move letters, and so the keys,
+only turn the outer layer, and n and j turn the same face in opposite
+directions, like the 2 by 2 cube.
+
+Copyright and Usage Information
+===============================
+
+This file is Copyright (c) 2021 Caleb Sadler.
+"""
+from __future__ import annotations
+from functools import lru_cache
+from typing import Optional, Tuple
+from math import pi, ceil, sqrt
+import numpy as np
+import pygame
+import state
+from cube import rotation_matrix
+
+# The outward direction, then the directions of the rows and columns, of each face
+FACES = [
+    ((0, 0, -1), (1, 0, 0), (0, 1, 0)),
+    ((1, 0, 0), (0, 1, 0), (0, 0, 1)),
+    ((0, 1, 0), (0, 0, 1), (1, 0, 0)),
+    ((0, 0, 1), (0, 1, 0), (1, 0, 0)),
+    ((-1, 0, 0), (0, 0, 1), (0, 1, 0)),
+    ((0, -1, 0), (1, 0, 0), (0, 0, 1))
+]
+
+# The colour of each face, matching the solved cube in cube.py
+COLOURS = [
+    (255, 255, 255),
+    (255, 0, 0),
+    (0, 204, 0),
+    (255, 255, 0),
+    (255, 128, 0),
+    (0, 102, 204)
+]
+
+# The vector each axis turns around, as in cube.py
+AXES = [
+    (1, 0, 0),
+    (0, 1, 0),
+    (0, 0, 1),
+    (-1, 0, 0),
+    (0, -1, 0),
+    (0, 0, -1),
+    (0, 1, 0),
+    (0, -1, 0)
+]
+
+# The coordinate and side of the outer layer each axis turns, or None to turn the whole cube
+LAYERS = [(0, 1), (1, -1), (2, -1), (0, 1), (1, -1), (2, -1), None, None]
+
+
+@lru_cache(maxsize=None)
+def get_geometry(size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the corners, centres and outward normals of every sticker of a cube with the
+    given size
+
+    The cube goes from -size to size along each axis, so each sticker is 2 wide. The
+    corners have shape (6 * size * size, 4, 3), and the stickers of each face are
+    together, row by row. The same arrays are returned for repeated calls, so they
+    must not be changed.
+    """
+    corners = []
+    centres = []
+    normals = []
+
+    for normal, row, column in FACES:
+        normal = np.array(normal)
+        row = np.array(row)
+        column = np.array(column)
+        for i in range(0, size):
+            for j in range(0, size):
+                centre = size * normal + (2 * i - size + 1) * row + (2 * j - size + 1) * column
+                corners.append([centre - row - column, centre - row + column,
+                                centre + row + column, centre + row - column])
+                centres.append(centre)
+                normals.append(normal)
+
+    return np.array(corners), np.array(centres), np.array(normals)
+
+
+@lru_cache(maxsize=None)
+def get_move_tables(size: int) -> Tuple[list[np.ndarray], list[np.ndarray]]:
+    """Return, for each axis, the sticker each sticker takes its colour from and the
+    stickers that turn, when the outer layer of a cube with the given size is turned
+
+    The same arrays are returned for repeated calls, so they must not be changed.
+    """
+    tables = [get_layer_table(size, axis, 0) for axis in range(0, len(AXES))]
+    return [source for source, _ in tables], [turning for _, turning in tables]
+
+
+@lru_cache(maxsize=None)
+def get_layer_table(size: int, axis: int, depth: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the sticker each sticker takes its colour from and the stickers that turn,
+    when the layer depth layers in from the face turned by axis is turned
+
+    The whole cube turns around the axes without a layer, whatever the depth. The same
+    arrays are returned for repeated calls, so they must not be changed.
+
+    Preconditions:
+        - 0 <= depth < size
+    """
+    _, centres, normals = get_geometry(size)
+    sticker_at = {(tuple(centres[i]), tuple(normals[i])): i for i in range(0, len(centres))}
+
+    if LAYERS[axis] is None:
+        turning = np.arange(0, len(centres))
+    else:
+        # the stickers on the face, and beside it in the outer layer, are in layer 0
+        coordinate, side = LAYERS[axis]
+        layer_of = np.clip((size - centres[:, coordinate] * side) // 2, 0, size - 1)
+        turning = np.nonzero(layer_of == depth)[0]
+
+    quarter_turn = np.rint(rotation_matrix(pi / 2, AXES[axis])).astype(int)
+    source = np.arange(0, len(centres))
+    for i in turning.tolist():
+        new_place = (tuple(quarter_turn @ centres[i]), tuple(quarter_turn @ normals[i]))
+        source[sticker_at[new_place]] = i
+
+    return source, turning
+
+
+@lru_cache(maxsize=16)
+def get_view(size: int, scale: float, view: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the corners and outward normals of every sticker of a cube with the given
+    size and scale, turned by the view matrix given as bytes, and the order to draw its
+    visible stickers in
+
+    Cubes of the same size and scale that face the same way share the same arrays, so
+    they are only worked out once however many cubes there are, and must not be changed.
+    """
+    corners, _, normals = get_geometry(size)
+    matrix = np.frombuffer(view).reshape(3, 3)
+    points = (corners * scale) @ matrix.T
+    view_normals = normals @ matrix.T
+    order = get_draw_order(points, view_normals)
+
+    for array in (points, view_normals, order):
+        array.setflags(write=False)
+
+    return points, view_normals, order
+
+
+def get_draw_order(points: np.ndarray, normals: np.ndarray) -> np.ndarray:
+    """Return the stickers facing the screen, from the furthest to the closest"""
+    visible = np.nonzero(normals[:, 2] < 0)[0]
+    depths = points[visible, :, 2].mean(axis=1)
+    return visible[np.argsort(-depths, kind='stable')]
+
+
+class BigCube:
+    """A Rubik's cube with size by size stickers on each face
+
+    Instance Attributes
+        - size: the number of stickers along each edge of a face
+        - stickers: the colour index of every sticker, in the order of get_geometry
+    """
+    # Private Instance Attributes:
+    #     - _origin: origin position of the cube in x, y, z
+    #     - _scale: the length on the screen of half a sticker
+    #     - _rest: the corners of every sticker, with the cube facing forwards
+    #     - _rest_normals: the outward normal of every sticker, with the cube facing forwards
+    #     - _view: the rotation that turns the cube to face the screen
+    #     - _view_prefix: the part of _view before the latest view rotation
+    #     - _view_vector: the vector of the latest view rotation
+    #     - _view_angle: the total angle of the latest view rotation
+    #     - _turn_axis: the rotation that is currently being animated
+    #     - _turn_depth: the layer that is currently being animated
+    #     - _turn_angle: how far the current rotation has turned so far
+    #     - _points: the positions of every sticker on the screen
+    #     - _normals: the outward normal of every sticker on the screen
+    #     - _order: the order to draw the visible stickers in, or None if it has to be
+    #           worked out when the cube is drawn
+    #     - _points_changed: whether _points needs to be computed again
+    #     - _solved: whether every face is one colour
+    size: int
+    stickers: np.ndarray
+    _origin: Tuple[float, float, float]
+    _scale: float
+    _rest: np.ndarray
+    _rest_normals: np.ndarray
+    _view: np.ndarray
+    _view_prefix: np.ndarray
+    _view_vector: Tuple[float, float, float]
+    _view_angle: float
+    _turn_axis: int
+    _turn_depth: int
+    _turn_angle: float
+    _points: np.ndarray
+    _normals: np.ndarray
+    _order: Optional[np.ndarray]
+    _points_changed: bool
+    _solved: bool
+
+    def __init__(self, origin: Tuple[float, float, float], length: int, size: int) -> None:
+        """Initialize a new solved cube
+
+        The cube is as big on the screen as a 2 by 2 cube from cube.py with the same length.
+        """
+        self.size = size
+        self.stickers = np.repeat(np.arange(0, len(FACES), dtype=np.uint8), size * size)
+        self._origin = origin
+        self._scale = length / size
+
+        corners, _, normals = get_geometry(size)
+        self._rest = corners * self._scale
+        self._rest_normals = normals.astype(float)
+        self._points = self._rest
+        self._normals = self._rest_normals
+        self._order = None
+        self._points_changed = True
+        self._solved = True
+
+        self._view = np.identity(3)
+        self._view_prefix = self._view
+        self._view_vector = (0, 0, 0)
+        self._view_angle = 0.0
+        self._turn_axis = 0
+        self._turn_depth = 0
+        self._turn_angle = 0.0
+
+        self.rotate_y(pi / 4)
+        self.rotate_x(pi / 8)
+        self.rotate_y(pi / 500)
+
+    def check_solve(self) -> bool:
+        """Check if the current cube is solved"""
+        return self._solved
+
+    def has_changed(self) -> bool:
+        """Return whether the cube has moved since it was last drawn"""
+        return self._points_changed
+
+    def get_bounds(self) -> pygame.Rect:
+        """Return the area of the screen that the cube can be drawn in, whichever way it faces
+
+        This includes the outlines of the stickers.
+        """
+        size = ceil(self._scale * self.size * sqrt(3)) + 5
+        return pygame.Rect(int(self._origin[0]) - size, int(self._origin[1]) - size,
+                           2 * size + 1, 2 * size + 1)
+
+    def visualize(self, screen: pygame.Surface) -> None:
+        """Visualize the cube
+
+        Only the stickers facing the screen are drawn, from the furthest to the closest.
+        """
+        self.update_points()
+
+        order = self._order
+        if order is None:
+            order = get_draw_order(self._points, self._normals)
+
+        screen_points = (self._points[..., :2] + self._origin[:2]).tolist()
+        outline = max(1, round(self._scale / 7))
+
+        for i in order.tolist():
+            rectangle = screen_points[i]
+            pygame.draw.polygon(screen, COLOURS[self.stickers[i]], rectangle, 0)
+            pygame.draw.polygon(screen, (0, 0, 0), rectangle, outline)
+
+    def update_corners(self, axis: int, depth: int = 0) -> None:
+        """Finish a move of the layer depth layers in from the face turned by the given axis
+
+        Any rotation being animated is replaced by moving the stickers.
+        """
+        source, _ = get_layer_table(self.size, axis, depth)
+        self.stickers = self.stickers[source]
+        self.update_solved()
+
+    def apply_sequence(self, move_str: str) -> None:
+        """Apply each move letter straight to the cube without animating it"""
+        sources, _ = get_move_tables(self.size)
+        for move in move_str:
+            self.stickers = self.stickers[sources[state.MOVES.index(move)]]
+
+        self.update_solved()
+
+    def update_solved(self) -> None:
+        """Check whether every face is one colour, after the stickers have moved"""
+        faces = self.stickers.reshape(len(FACES), -1)
+        self._solved = bool((faces == faces[:, :1]).all())
+        self._turn_angle = 0.0
+        self._points_changed = True
+
+    def update_points(self) -> None:
+        """Compute the position of every point on the screen, if anything has changed
+
+        While no layer is turning, the points are shared with every other cube facing
+        the same way.
+        """
+        if not self._points_changed:
+            return
+
+        points, normals, order = get_view(self.size, self._scale, self._view.tobytes())
+
+        if self._turn_angle != 0:
+            _, turning = get_layer_table(self.size, self._turn_axis, self._turn_depth)
+            matrix = self._view @ rotation_matrix(self._turn_angle, AXES[self._turn_axis])
+            points = points.copy()
+            normals = normals.copy()
+            points[turning] = self._rest[turning] @ matrix.T
+            normals[turning] = self._rest_normals[turning] @ matrix.T
+            order = None
+
+        self._points = points
+        self._normals = normals
+        self._order = order
+        self._points_changed = False
+
+    def rotate_view(self, theta: float, vector: Tuple[float, float, float]) -> None:
+        """Rotate the whole cube on the screen around the given vector"""
+        if vector != self._view_vector:
+            self._view_prefix = self._view
+            self._view_vector = vector
+            self._view_angle = 0.0
+
+        self._view_angle += theta
+        self._view = rotation_matrix(self._view_angle, vector) @ self._view_prefix
+        self._points_changed = True
+
+    def rotate_x(self, theta: float) -> None:
+        """Rotate cube around x"""
+        self.rotate_view(theta, (1, 0, 0))
+
+    def rotate_y(self, theta: float) -> None:
+        """Rotate cube around y"""
+        self.rotate_view(theta, (0, 1, 0))
+
+    def rotate_z(self, theta: float) -> None:
+        """Rotate cube around z"""
+        self.rotate_view(theta, (0, 0, 1))
+
+    def relative_rotation(self, theta: float, axis: int, depth: int = 0) -> None:
+        """Turn the layer depth layers in from the face turned by the given axis by theta
+
+        The rotation is only stored, and is applied to the points by update_points.
+        Starting to turn another layer drops what is left of the last turn.
+        """
+        if axis != self._turn_axis or depth != self._turn_depth:
+            self._turn_angle = 0.0
+
+        self._turn_axis = axis
+        self._turn_depth = depth
+        self._turn_angle += theta
+        self._points_changed = True
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['__future__', 'functools', 'typing', 'math', 'numpy', 'pygame', 'state',
+                          'cube', 'python_ta.contracts'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
+
+    import python_ta.contracts
+
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
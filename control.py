@@ -0,0 +1,314 @@
+"""control
+
+Description
+===============================
+
+This Python module is a local server that lets other programs, such
+as trainers, bots and test harnesses, drive the cube.
+
+Clients connect to a TCP port on this computer or to a Unix socket,
+and send one JSON object per line. Each gets one JSON line back:
+
+    {"cmd": "moves", "moves": "ntv"}   queue move letters
+    {"cmd": "state"}                   the state of the cube and whether it is solved
+    {"cmd": "subscribe"}               be sent every move from now on
+    {"cmd": "unsubscribe"}             stop being sent moves
+
+Every reply has "ok", with "error" when it is false, and the "id" of
+the command if it has one. Subscribed clients are also sent
+{"event": "move", "move": "n", "solved": false} after every move.
+
+The server runs in its own thread, so it never holds up a frame, and
+answers questions about the state without waiting for the next frame.
+
+Copyright and Usage Information
+===============================
+
+This file is Copyright (c) 2021 Caleb Sadler.
+"""
+from __future__ import annotations
+from collections import deque
+from typing import Optional
+import asyncio
+import json
+import os
+import threading
+import pygame
+import state
+from state import CubeState
+
+HOST = '127.0.0.1'
+PORT = 7425
+
+# The longest line a client may send, in bytes
+MAX_LINE = 65536
+
+# The most move letters from clients waiting to be taken, before more are refused
+MAX_WAITING = 10000
+
+# The most bytes waiting to be sent to a client before it is disconnected for being too slow
+MAX_BACKLOG = 1 << 20
+
+# Posted to the pygame event queue when moves arrive, to wake the loop if it is waiting
+WAKE_EVENT = pygame.event.custom_type()
+
+
+class ControlServer:
+    """A server that queues moves sent by clients, and tells them about every move made
+
+    The server is told about moves like a recorder, so it can be put in a RecorderGroup.
+    """
+    # Private Instance Attributes:
+    #     - _host: the address to listen on, when _path is None
+    #     - _port: the port to listen on, when _path is None
+    #     - _path: the Unix socket to listen on, or None to listen on _host and _port
+    #     - _state: the state of the cube after the moves made so far
+    #     - _key: the canonical key of _state, or None if it has not been worked out yet
+    #     - _incoming: the move strings sent by clients that have not been taken yet
+    #     - _waiting: the number of move letters in _incoming
+    #     - _lock: held while _incoming and _waiting are changed
+    #     - _clients: every connected client
+    #     - _subscribers: the clients that are sent every move
+    #     - _loop: the event loop of the server thread
+    #     - _thread: the thread the server runs in
+    #     - _ready: set once the server is listening, or has failed to
+    #     - _error: the error that stopped the server from listening, if any
+    _host: str
+    _port: int
+    _path: Optional[str]
+    _state: CubeState
+    _key: Optional[int]
+    _incoming: deque
+    _waiting: int
+    _lock: threading.Lock
+    _clients: set[asyncio.StreamWriter]
+    _subscribers: set[asyncio.StreamWriter]
+    _loop: Optional[asyncio.AbstractEventLoop]
+    _thread: Optional[threading.Thread]
+    _ready: threading.Event
+    _error: Optional[OSError]
+
+    def __init__(self, start_state: CubeState, host: str = HOST, port: int = PORT,
+                 path: Optional[str] = None) -> None:
+        """Initialize a new server for a cube in start_state
+
+        The server listens on the Unix socket at path if it is given, and otherwise
+        on host and port. It does not start listening until start is called.
+        """
+        self._host = host
+        self._port = port
+        self._path = path
+        self._state = start_state
+        self._key = None
+        self._incoming = deque()
+        self._waiting = 0
+        self._lock = threading.Lock()
+        self._clients = set()
+        self._subscribers = set()
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    def start(self) -> None:
+        """Start listening in a new thread, raising OSError if the server cannot listen"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+        if self._error is not None:
+            raise self._error
+
+    def has_moves(self) -> bool:
+        """Return whether clients have sent moves that have not been taken yet"""
+        return len(self._incoming) > 0
+
+    def take_moves(self, limit: int) -> str:
+        """Return up to limit of the move letters sent by clients, in the order they were
+        sent, leaving the rest to be taken later
+
+        This is called by the pygame loop, and never waits for the server.
+        """
+        move_strs = []
+        count = 0
+
+        with self._lock:
+            while self._incoming and count < limit:
+                move_str = self._incoming.popleft()
+                if count + len(move_str) > limit:
+                    self._incoming.appendleft(move_str[limit - count:])
+                    move_str = move_str[:limit - count]
+
+                move_strs.append(move_str)
+                count += len(move_str)
+
+            self._waiting -= count
+
+        return ''.join(move_strs)
+
+    def record(self, axis: int) -> None:
+        """Tell the server about a move around the given axis"""
+        self.record_sequence(state.MOVES[axis])
+
+    def record_sequence(self, move_str: str) -> None:
+        """Tell the server about each move letter in order"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._moved, move_str)
+
+    def close(self) -> None:
+        """Stop the server and disconnect every client"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def _run(self) -> None:
+        """Run the server until it is closed"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        try:
+            if self._path is not None:
+                server = loop.run_until_complete(asyncio.start_unix_server(
+                    self._handle_client, self._path, limit=MAX_LINE))
+            else:
+                server = loop.run_until_complete(asyncio.start_server(
+                    self._handle_client, self._host, self._port, limit=MAX_LINE))
+        except OSError as error:
+            self._error = error
+            loop.close()
+            self._ready.set()
+            return
+
+        self._loop = loop
+        self._ready.set()
+        loop.run_forever()
+
+        # every client is disconnected, and finishes, before the loop is closed
+        server.close()
+        for writer in self._clients:
+            writer.close()
+        loop.run_until_complete(asyncio.gather(*asyncio.all_tasks(loop)))
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+
+        if self._path is not None:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+
+    async def _handle_client(self, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> None:
+        """Answer each command from a client until it disconnects"""
+        self._clients.add(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # the line is longer than MAX_LINE
+                    writer.write(_encode({'ok': False, 'error': 'line too long'}))
+                    break
+
+                if line == b'':
+                    break
+
+                writer.write(_encode(self._reply(line, writer)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.discard(writer)
+            self._subscribers.discard(writer)
+            writer.close()
+
+    def _reply(self, line: bytes, writer: asyncio.StreamWriter) -> dict:
+        """Carry out a single command, returning the reply to send"""
+        try:
+            command = json.loads(line)
+        except ValueError:
+            return {'ok': False, 'error': 'not JSON'}
+
+        if not isinstance(command, dict):
+            return {'ok': False, 'error': 'not a JSON object'}
+
+        reply = self._carry_out(command, writer)
+        if 'id' in command:
+            reply['id'] = command['id']
+
+        return reply
+
+    def _carry_out(self, command: dict, writer: asyncio.StreamWriter) -> dict:
+        """Carry out a command that has been read, returning the reply to send"""
+        name = command.get('cmd')
+
+        if name == 'moves':
+            move_str = command.get('moves')
+            if not isinstance(move_str, str) or any(move not in state.MOVES for move in move_str):
+                return {'ok': False, 'error': f'moves must only use the letters {state.MOVES}'}
+            if move_str == '':
+                return {'ok': True, 'queued': 0}
+
+            with self._lock:
+                if self._waiting + len(move_str) > MAX_WAITING:
+                    return {'ok': False, 'error': 'too many moves waiting, try again later'}
+
+                self._incoming.append(move_str)
+                self._waiting += len(move_str)
+
+            try:
+                pygame.event.post(pygame.event.Event(WAKE_EVENT))
+            except pygame.error:  # the window is closed, so there is nothing to wake
+                pass
+
+            return {'ok': True, 'queued': len(move_str)}
+        elif name == 'state':
+            if self._key is None:
+                self._key = state.canonical_key(self._state)
+
+            return {'ok': True, 'perm': self._state.perm, 'twist': self._state.twist,
+                    'key': self._key, 'solved': self._state.is_solved()}
+        elif name == 'subscribe':
+            self._subscribers.add(writer)
+            return {'ok': True}
+        elif name == 'unsubscribe':
+            self._subscribers.discard(writer)
+            return {'ok': True}
+        else:
+            return {'ok': False, 'error': f'unknown command {name!r}'}
+
+    def _moved(self, move_str: str) -> None:
+        """Apply moves to the state, and send each of them to every subscriber"""
+        self._key = None
+        for move in move_str:
+            self._state = self._state.apply(move)
+            line = _encode({'event': 'move', 'move': move, 'solved': self._state.is_solved()})
+
+            for writer in list(self._subscribers):
+                if writer.transport.get_write_buffer_size() > MAX_BACKLOG:
+                    self._subscribers.discard(writer)
+                    writer.close()
+                else:
+                    writer.write(line)
+
+
+def _encode(message: dict) -> bytes:
+    """Return a message as a line of JSON"""
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['__future__', 'collections', 'typing', 'asyncio', 'json', 'os',
+                          'threading', 'pygame', 'state', 'python_ta.contracts'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
+
+    import python_ta.contracts
+
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
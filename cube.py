@@ -13,9 +13,56 @@ Copyright and Usage Information
 This file is Copyright (c) 2020 Caleb Sadler.
 """
 from __future__ import annotations
-from typing import Tuple
-from math import sin, cos, pi
+from functools import lru_cache
+from typing import Optional, Tuple
+from math import sin, cos, pi, ceil
+import numpy as np
 import pygame
+import state
+from state import CubeState
+
+
+@lru_cache(maxsize=64)
+def rotation_matrix(theta: float, vector: Tuple[float, float, float]) -> np.ndarray:
+    """Return the matrix that rotates a point by theta around the given unit vector
+
+    The same matrix is returned for repeated calls, so it must not be changed.
+    """
+    vx = vector[0]
+    vy = vector[1]
+    vz = vector[2]
+    c = cos(theta)
+    s = sin(theta)
+    t = 1 - c
+
+    return np.array([
+        [c + vx ** 2 * t, vx * vy * t - vz * s, vy * s + vx * vz * t],
+        [vz * s + vx * vy * t, c + vy ** 2 * t, -vx * s + vy * vz * t],
+        [-vy * s + vx * vz * t, vx * s + vy * vz * t, c + vz ** 2 * t]
+    ])
+
+
+def rotate_points(points: np.ndarray, matrix: np.ndarray) -> None:
+    """Rotate every point in the array, whose last dimension is x, y, z, in place
+
+    The array must be contiguous, so that it can be viewed as a list of points.
+    """
+    flat = points.reshape(-1, 3)
+    flat[...] = flat @ matrix.T
+
+
+def get_normals(sides: np.ndarray, centres: np.ndarray) -> np.ndarray:
+    """Return the outward normal of each side
+
+    sides has shape (..., 4, 3) and centres holds the centre of each side. The
+    sides belong to corners whose inner point is the centre of the cube, so the
+    normal pointing away from the centre of the cube is the outward one.
+    """
+    normals = np.cross(sides[..., 1, :] - sides[..., 0, :], sides[..., 3, :] - sides[..., 0, :])
+    inward = (normals * centres).sum(axis=-1) < 0
+    normals[inward] *= -1
+
+    return normals
 
 
 class Corner:
@@ -25,14 +72,14 @@ class Corner:
     Each corner has three neighbours, each face corresponding to a neighbour.
     """
     # Private Instance Attributes:
-    #     - sides: list of positions for each face
+    #     - sides: array of positions for each point of each face, with shape (3, 4, 3)
     #     - origin: origin position of this corner in x, y, z
     #     - colours: list of colours for each face of the corner
     #     - col_index: mapping between the index of the colour and its original index
     #     - length: length of each side of the corner
     #     - neighbours: list of neighbours and coordinates of each face they are adjacent to
     #     - neighbour_index: the index of each neighbour in the Cube's corners list
-    sides: list[list]
+    sides: np.ndarray
     origin: Tuple[float, float, float]
     colours: list[Tuple[int, int, int]]
     col_index: dict[int: int]
@@ -41,8 +88,11 @@ class Corner:
     neighbour_index: list[int]
 
     def __init__(self, origin: Tuple[float, float, float], colours: list[Tuple[int, int, int]],
-                 length: int, thetas: list[float]) -> None:
-        """Initialize new corner of a cube"""
+                 length: int, thetas: list[float], sides: Optional[np.ndarray] = None) -> None:
+        """Initialize new corner of a cube
+
+        If sides is given, the positions of the corner are stored in that array.
+        """
         self.origin = origin
         self.colours = colours
         self.length = length
@@ -52,7 +102,11 @@ class Corner:
             2: 2
         }
 
-        self.sides = [
+        if sides is None:
+            sides = np.empty((3, 4, 3))
+
+        self.sides = sides
+        self.sides[...] = [
             [(0, 0, 1), (0, 1, 1), (1, 1, 1), (1, 0, 1)],
             [(0, 1, 1), (0, 1, 0), (1, 1, 0), (1, 1, 1)],
             [(1, 0, 1), (1, 1, 1), (1, 1, 0), (1, 0, 0)]
@@ -77,17 +131,7 @@ class Corner:
     def multiply_points(self) -> None:
         """Multiply the points to the initial length
         """
-        for side_i in range(0, len(self.sides)):
-            for point_i in range(0, len(self.sides[side_i])):
-                x = self.sides[side_i][point_i][0]
-                y = self.sides[side_i][point_i][1]
-                z = self.sides[side_i][point_i][2]
-
-                self.sides[side_i][point_i] = [
-                    x * self.length,
-                    y * self.length,
-                    z * self.length
-                ]
+        self.sides *= self.length
 
     def initial_rotate(self, thetas: list[float]) -> None:
         """Rotate corner in given direction"""
@@ -96,101 +140,34 @@ class Corner:
 
     def rotate_x(self, theta: float) -> None:
         """Rotate corner around x"""
-        for side_i in range(0, len(self.sides)):
-            for point_i in range(0, len(self.sides[side_i])):
-                x = self.sides[side_i][point_i][0]
-                y = self.sides[side_i][point_i][1]
-                z = self.sides[side_i][point_i][2]
-
-                self.sides[side_i][point_i] = (
-                    x,
-                    y * cos(theta) + z * -sin(theta),
-                    y * sin(theta) + z * cos(theta)
-                )
+        rotate_points(self.sides, rotation_matrix(theta, (1, 0, 0)))
 
     def rotate_y(self, theta: float) -> None:
-        """Rotate corner around x"""
-        for side_i in range(0, len(self.sides)):
-            for point_i in range(0, len(self.sides[side_i])):
-                x = self.sides[side_i][point_i][0]
-                y = self.sides[side_i][point_i][1]
-                z = self.sides[side_i][point_i][2]
-
-                self.sides[side_i][point_i] = (
-                    x * cos(theta) + z * sin(theta),
-                    y,
-                    x * -sin(theta) + z * cos(theta)
-                )
+        """Rotate corner around y"""
+        rotate_points(self.sides, rotation_matrix(theta, (0, 1, 0)))
 
     def rotate_z(self, theta: float) -> None:
-        """Rotate corner around x"""
-        for side_i in range(0, len(self.sides)):
-            for point_i in range(0, len(self.sides[side_i])):
-                x = self.sides[side_i][point_i][0]
-                y = self.sides[side_i][point_i][1]
-                z = self.sides[side_i][point_i][2]
-
-                self.sides[side_i][point_i] = (
-                    x * cos(theta) + y * -sin(theta),
-                    x * sin(theta) + y * cos(theta),
-                    z
-                )
+        """Rotate corner around z"""
+        rotate_points(self.sides, rotation_matrix(theta, (0, 0, 1)))
 
     def relative_rotation(self, theta: float, vector: tuple) -> None:
         """Rotate corner around given vector"""
-        for side_i in range(0, len(self.sides)):
-            for point_i in range(0, len(self.sides[side_i])):
-                x = self.sides[side_i][point_i][0]
-                y = self.sides[side_i][point_i][1]
-                z = self.sides[side_i][point_i][2]
-                vx = vector[0]
-                vy = vector[1]
-                vz = vector[2]
-
-                r = [
-                    [
-                        x * (cos(theta) + vx ** 2 * (1 - cos(theta))),
-                        y * (vx * vy * (1 - cos(theta)) - vz * sin(theta)),
-                        z * (vy * sin(theta) + vx * vz * (1 - cos(theta)))
-                    ],
-                    [
-                        x * (vz * sin(theta) + vx * vy * (1 - cos(theta))),
-                        y * (cos(theta) + vy ** 2 * (1 - cos(theta))),
-                        z * (-vx * sin(theta) + vy * vz * (1 - cos(theta)))
-                    ],
-                    [
-                        x * (-vy * sin(theta) + vx * vz * (1 - cos(theta))),
-                        y * (vx * sin(theta) + vy * vz * (1 - cos(theta))),
-                        z * (cos(theta) + vz ** 2 * (1 - cos(theta)))
-                    ]
-                ]
-
-                self.sides[side_i][point_i] = (
-                    r[0][0] + r[0][1] + r[0][2],
-                    r[1][0] + r[1][1] + r[1][2],
-                    r[2][0] + r[2][1] + r[2][2]
-                )
+        rotate_points(self.sides, rotation_matrix(theta, vector))
 
     def draw_sides(self, screen: pygame.Surface) -> None:
-        """Draw each side of the corner"""
-        index = 0
-        side_list = []
-        side_dict = {}
-
-        for side in self.sides:
-            side_list.append((side[0][2] + side[1][2] + side[2][2] + side[3][2]) / 4)
-            side_dict[side_list[index]] = index
-            index += 1
-
-        side_list.sort(reverse=True)
-
-        for i in range(0, len(side_list)):
-            side = self.sides[side_dict[side_list[i]]]
-            colour = self.colours[side_dict[side_list[i]]]
-            rectangle = ((self.to_world(side[0])), self.to_world(side[1]),
-                         self.to_world(side[2]), self.to_world(side[3]))
-            pygame.draw.polygon(screen, colour, rectangle, 0)
-            pygame.draw.polygon(screen, (0, 0, 0), rectangle, 5)
+        """Draw each side of the corner that faces the screen, furthest first"""
+        centres = self.sides.mean(axis=1)
+        normals = get_normals(self.sides, centres)
+        depths = centres[:, 2].tolist()
+        order = sorted(range(0, len(self.sides)), key=lambda i: depths[i], reverse=True)
+
+        for i in order:
+            if normals[i][2] < 0:
+                side = self.sides[i]
+                rectangle = ((self.to_world(side[0])), self.to_world(side[1]),
+                             self.to_world(side[2]), self.to_world(side[3]))
+                pygame.draw.polygon(screen, self.colours[i], rectangle, 0)
+                pygame.draw.polygon(screen, (0, 0, 0), rectangle, 5)
 
     def to_world(self, point: Tuple[float, float, float]) -> Tuple[float, float]:
         """Return 2d point given a 3d point
@@ -209,8 +186,30 @@ class Cube:
     """
     # Private Instance Attributes:
     #     - _origin: origin position of the cube in x, y, z
+    #     - _rest: the positions of every corner in the solved cube, before
+    #           it is turned to face the screen, with shape (8, 3, 4, 3)
+    #     - _rest_centres: the centre of each side of each corner in _rest
+    #     - _rest_normals: the outward normal of each side of each corner in _rest
+    #     - _radius: the distance from the centre of the cube to its furthest point
+    #     - _row_corners: the corner in each row of the arrays below
+    #     - _transforms: the rotation of each corner from its rest position,
+    #           with shape (8, 3, 3); these only ever hold whole quarter turns
+    #     - _view: the rotation that turns the cube to face the screen
+    #     - _view_prefix: the part of _view before the latest view rotation
+    #     - _view_vector: the vector of the latest view rotation
+    #     - _view_angle: the total angle of the latest view rotation
+    #     - _turn_axis: the rotation that is currently being animated
+    #     - _turn_angle: how far the current rotation has turned so far
+    #     - _points: the positions of every corner on the screen, computed
+    #           from the above by update_points
+    #     - _normals: the outward normal of each side on the screen
+    #     - _points_changed: whether _points needs to be computed again
+    #     - _slot_rows: the row in the arrays above of the corner in each slot;
+    #           each corner keeps the same row as it moves
+    #     - _rotation_rows: the rows that are rotated for each rotation
     #     - _rotation_axes: list of unit vectors that the cube
-    #           is rotated around for each rotation
+    #           is rotated around for each rotation, before the cube is
+    #           turned to face the screen
     #     - _rotation_corners: list of corners that are rotated
     #           for each rotation
     #     - _rotation_new_corners: the index for which each corner
@@ -218,37 +217,83 @@ class Cube:
     #     - updated_corners: the reverse of _rotation_new_corners
     #     - _update_colours: list of new colour indices for when
     #           a corner is rotated
+    #     - _slot_neighbours: the index of the slot next to each edge
+    #           of each slot
+    #     - _neighbour_faces: the faces of the neighbouring slot that
+    #           touch each edge of a slot
+    #     - _solved_count: the number of corners that match all their neighbours,
+    #           counted again whenever a move is committed
     corners: list[Corner]
     _origin: Tuple[float, float, float]
+    _rest: np.ndarray
+    _rest_centres: np.ndarray
+    _rest_normals: np.ndarray
+    _radius: float
+    _row_corners: list[Corner]
+    _transforms: np.ndarray
+    _view: np.ndarray
+    _view_prefix: np.ndarray
+    _view_vector: Tuple[float, float, float]
+    _view_angle: float
+    _turn_axis: int
+    _turn_angle: float
+    _points: np.ndarray
+    _normals: np.ndarray
+    _points_changed: bool
+    _slot_rows: list[int]
+    _rotation_rows: list[np.ndarray]
     _rotation_axes: list[tuple]
     _rotation_corners: list[list]
     _rotation_new_corners: list[list]
     _updated_corners: list[list]
     _update_colour: list[list[tuple]]
+    _slot_neighbours: list[list[int]]
+    _neighbour_faces: list[tuple]
+    _solved_count: int
 
     def __init__(self, origin: Tuple[float, float, float], length: int) -> None:
         """Initialize a new cube"""
         self._origin = origin
+        self._rest = np.empty((8, 3, 4, 3))
+        self._points = np.empty((8, 3, 4, 3))
+        self._normals = np.empty((8, 3, 3))
+        self._points_changed = True
+        self._transforms = np.array([np.identity(3)] * 8)
+        self._view = np.identity(3)
+        self._view_prefix = self._view
+        self._view_vector = (0, 0, 0)
+        self._view_angle = 0.0
+        self._turn_axis = 0
+        self._turn_angle = 0.0
+        self._slot_rows = list(range(0, 8))
 
         self.corners = [
             Corner(self._origin, [(255, 255, 255), (255, 0, 0), (0, 204, 0)],
-                   length, [pi, 3 * pi / 2]),
+                   length, [pi, 3 * pi / 2], self._rest[0]),
             Corner(self._origin, [(255, 255, 255), (0, 102, 204), (255, 0, 0)],
-                   length, [pi, pi]),
+                   length, [pi, pi], self._rest[1]),
             Corner(self._origin, [(255, 255, 0), (255, 0, 0), (0, 102, 204)],
-                   length, [0, 3 * pi / 2]),
+                   length, [0, 3 * pi / 2], self._rest[2]),
             Corner(self._origin, [(255, 255, 0), (0, 204, 0), (255, 0, 0)],
-                   length, [0, 0]),
+                   length, [0, 0], self._rest[3]),
             Corner(self._origin, [(255, 255, 255), (0, 204, 0), (255, 128, 0)],
-                   length, [pi, 0]),
+                   length, [pi, 0], self._rest[4]),
             Corner(self._origin, [(255, 255, 255), (255, 128, 0), (0, 102, 204)],
-                   length, [pi, pi / 2]),
+                   length, [pi, pi / 2], self._rest[5]),
             Corner(self._origin, [(255, 255, 0), (0, 102, 204), (255, 128, 0)],
-                   length, [0, pi]),
+                   length, [0, pi], self._rest[6]),
             Corner(self._origin, [(255, 255, 0), (255, 128, 0), (0, 204, 0)],
-                   length, [0, pi / 2])
+                   length, [0, pi / 2], self._rest[7])
         ]
 
+        for i in range(0, len(self.corners)):
+            self.corners[i].sides = self._points[i]
+
+        self._row_corners = list(self.corners)
+        self._rest_centres = self._rest.mean(axis=2)
+        self._rest_normals = get_normals(self._rest, self._rest_centres)
+        self._radius = float(np.linalg.norm(self._rest, axis=-1).max())
+
         self._rotation_axes = [
             (1, 0, 0),
             (0, 1, 0),
@@ -306,99 +351,155 @@ class Cube:
              (1, 2, 0), (2, 0, 1), (1, 2, 0), (2, 0, 1)]
         ]
 
+        self._slot_neighbours = [
+            [1, 3, 4],
+            [5, 2, 0],
+            [3, 1, 6],
+            [7, 0, 2],
+            [0, 7, 5],
+            [4, 6, 1],
+            [2, 5, 7],
+            [6, 4, 3]
+        ]
+
+        self._neighbour_faces = [(0, 2), (2, 1), (1, 0)]
+
         self.set_corner_neighbours()
+        self.count_solved()
+        self.update_rows()
         self.rotate_y(pi / 4)
         self.rotate_x(pi / 8)
         self.rotate_y(pi / 500)
 
     def set_corner_neighbours(self) -> None:
-        """Set each corner to its correct neighbour"""
-        self.corners[0].neighbours = [
-            [self.corners[1], (0, 1), (0, 2)],
-            [self.corners[3], (1, 2), (2, 1)],
-            [self.corners[4], (2, 0), (1, 0)]
-        ]
-        self.corners[0].neighbour_index = [1, 3, 4]
+        """Set each corner to its correct neighbour given the twist of each corner"""
+        for i in range(0, len(self.corners)):
+            corner = self.corners[i]
+            twist = corner.col_index[0]
+            corner.neighbours = []
+            corner.neighbour_index = []
+
+            for edge in range(0, 3):
+                # the colours (edge, edge + 1) of the corner lie on this edge of the slot
+                slot_edge = (edge + twist) % 3
+                neighbour = self.corners[self._slot_neighbours[i][slot_edge]]
+                other_twist = neighbour.col_index[0]
+                faces = self._neighbour_faces[slot_edge]
+
+                corner.neighbours.append([
+                    neighbour,
+                    (edge, (edge + 1) % 3),
+                    ((faces[0] - other_twist) % 3, (faces[1] - other_twist) % 3)
+                ])
+                corner.neighbour_index.append(self._slot_neighbours[i][slot_edge])
+
+    def get_state(self) -> CubeState:
+        """Return the logical state of the cube"""
+        pieces = [state.SOLVED_COLOURS.index(corner.colours) for corner in self.corners]
+        twists = [corner.col_index[0] for corner in self.corners]
+
+        return state.from_corners(pieces, twists)
+
+    def set_state(self, new_state: CubeState) -> None:
+        """Rebuild the corners of the cube so that it is in the given state
+
+        The cube keeps its current orientation on the screen.
+        """
+        pieces, twists = new_state.corners()
+        transforms = np.empty((8, 3, 3))
+        by_piece = {}
 
-        self.corners[1].neighbours = [
-            [self.corners[5], (0, 1), (0, 2)],
-            [self.corners[2], (1, 2), (2, 1)],
-            [self.corners[0], (2, 0), (1, 0)]
-        ]
-        self.corners[1].neighbour_index = [5, 2, 0]
+        for i in range(0, len(self.corners)):
+            corner = self.corners[i]
+            row = self._slot_rows[i]
+            by_piece[state.SOLVED_COLOURS.index(corner.colours)] = corner
 
-        self.corners[2].neighbours = [
-            [self.corners[3], (0, 1), (0, 2)],
-            [self.corners[1], (1, 2), (2, 1)],
-            [self.corners[6], (2, 0), (1, 0)]
-        ]
-        self.corners[2].neighbour_index = [3, 1, 6]
+            # the centre of each side of the slot, then of each side of the new corner
+            centres = self._rest_centres[row] @ self._transforms[row].T
+            slot_centres = centres[[(face - corner.col_index[0]) % 3 for face in range(0, 3)]]
+            new_centres = slot_centres[[(colour + twists[i]) % 3 for colour in range(0, 3)]]
 
-        self.corners[3].neighbours = [
-            [self.corners[7], (0, 1), (0, 2)],
-            [self.corners[0], (1, 2), (2, 1)],
-            [self.corners[2], (2, 0), (1, 0)]
-        ]
-        self.corners[3].neighbour_index = [7, 0, 2]
+            transforms[pieces[i]] = np.rint(
+                new_centres.T @ np.linalg.inv(self._rest_centres[pieces[i]].T))
 
-        self.corners[4].neighbours = [
-            [self.corners[0], (0, 1), (0, 2)],
-            [self.corners[7], (1, 2), (2, 1)],
-            [self.corners[5], (2, 0), (1, 0)]
-        ]
-        self.corners[4].neighbour_index = [0, 7, 5]
+        self.corners = [by_piece[piece] for piece in pieces]
+        self._slot_rows = pieces
+        self._transforms = transforms
+        self._turn_angle = 0.0
+        self._points_changed = True
+        self.update_rows()
 
-        self.corners[5].neighbours = [
-            [self.corners[4], (0, 1), (0, 2)],
-            [self.corners[6], (1, 2), (2, 1)],
-            [self.corners[1], (2, 0), (1, 0)]
-        ]
-        self.corners[5].neighbour_index = [4, 6, 1]
+        for i in range(0, len(self.corners)):
+            self.corners[i].col_index = {face: (face + twists[i]) % 3 for face in range(0, 3)}
 
-        self.corners[6].neighbours = [
-            [self.corners[2], (0, 1), (0, 2)],
-            [self.corners[5], (1, 2), (2, 1)],
-            [self.corners[7], (2, 0), (1, 0)]
-        ]
-        self.corners[6].neighbour_index = [2, 5, 7]
+        self.set_corner_neighbours()
+        self.count_solved()
 
-        self.corners[7].neighbours = [
-            [self.corners[6], (0, 1), (0, 2)],
-            [self.corners[4], (1, 2), (2, 1)],
-            [self.corners[3], (2, 0), (1, 0)]
-        ]
-        self.corners[7].neighbour_index = [6, 4, 3]
+    def apply_sequence(self, move_str: str) -> None:
+        """Apply each move letter straight to the cube without animating it
+
+        The geometry is only rebuilt once, however many moves there are.
+        """
+        self.set_state(self.get_state().apply_sequence(move_str))
 
     def check_solve(self) -> bool:
         """Check if the current cube is solved"""
-        for corner in self.corners:
-            if not corner.check_solve():
-                return False
+        return self._solved_count == len(self.corners)
 
-        return True
+    def get_solved_count(self) -> int:
+        """Return the number of corners that match all their neighbours"""
+        return self._solved_count
 
-    def visualize(self, screen: pygame.Surface) -> None:
-        """Visualize the cube"""
-        index = 0
-        average_list = []
-        average_dict = {}
+    def count_solved(self) -> None:
+        """Count the corners that match all their neighbours
+
+        This only needs to be done when the corners move.
+        """
+        self._solved_count = sum(1 for corner in self.corners if corner.check_solve())
 
-        for corner in self.corners:
-            side_list = []
-            for side in corner.sides:
-                side_list.append((side[0][2] + side[1][2] + side[2][2] + side[3][2]) / 4)
-            average_list.append(max(side_list))
-            average_dict[average_list[index]] = corner
-            index += 1
+    def has_changed(self) -> bool:
+        """Return whether the cube has moved since it was last drawn"""
+        return self._points_changed
 
-        average_list.sort(reverse=True)
+    def get_bounds(self) -> pygame.Rect:
+        """Return the area of the screen that the cube can be drawn in, whichever way it faces
 
-        for i in range(0, len(average_list)):
-            corner = average_dict[average_list[i]]
-            corner.draw_sides(screen)
+        This includes the outlines of the sides.
+        """
+        size = ceil(self._radius) + 5
+        return pygame.Rect(int(self._origin[0]) - size, int(self._origin[1]) - size,
+                           2 * size + 1, 2 * size + 1)
+
+    def visualize(self, screen: pygame.Surface) -> None:
+        """Visualize the cube
+
+        Only the sides facing the screen are drawn, from the furthest to the closest.
+        """
+        self.update_points()
+
+        rows, sides = np.nonzero(self._normals[..., 2] < 0)
+        depths = self._points[rows, sides, :, 2].mean(axis=1)
+        order = np.argsort(-depths, kind='stable')
+        screen_points = (self._points[..., :2] + self._origin[:2]).tolist()
+
+        for i in order.tolist():
+            row = rows[i]
+            side = sides[i]
+            rectangle = screen_points[row][side]
+            pygame.draw.polygon(screen, self._row_corners[row].colours[side], rectangle, 0)
+            pygame.draw.polygon(screen, (0, 0, 0), rectangle, 5)
 
     def update_corners(self, axis: int) -> None:
-        """Update the positions of the corners"""
+        """Update the positions of the corners
+
+        Any rotation being animated is replaced by an exact quarter turn around the axis.
+        """
+        rows = self._rotation_rows[axis]
+        quarter_turn = np.rint(rotation_matrix(pi / 2, self._rotation_axes[axis]))
+        self._transforms[rows] = quarter_turn @ self._transforms[rows]
+        self._turn_angle = 0.0
+        self._points_changed = True
+
         corner_copies = []
 
         for i in self._rotation_new_corners[axis]:
@@ -408,6 +509,11 @@ class Cube:
         self.get_new_neighbour_info(axis, change_neighbour)
         self.update_neighbours(axis, change_neighbour)
         self.update_colours(axis, corner_copies)
+        self._slot_rows = [self._slot_rows[i] for i in state.MOVE_SOURCES[axis]]
+        self.update_rows()
+
+        if axis < 6:  # turning the whole cube keeps every corner next to the same colours
+            self.count_solved()
 
     def get_new_neighbour_info(self, axis: int, change_neighbour: dict) -> None:
         """Get the neighbour information of each corner that moves in the rotation"""
@@ -464,60 +570,80 @@ class Cube:
             self.corners[i].col_index[i2] = self._update_colour[axis][j][2]
             self.corners[i] = corner_copies[j]
 
-    def rotate_x(self, theta: float) -> None:
-        """Rotate cube around x"""
-        for axis_i in range(0, len(self._rotation_axes)):
-            x = self._rotation_axes[axis_i][0]
-            y = self._rotation_axes[axis_i][1]
-            z = self._rotation_axes[axis_i][2]
+    def update_rows(self) -> None:
+        """Update the rows of _points that are rotated for each rotation"""
+        self._rotation_rows = [
+            np.array([self._slot_rows[i] for i in corners]) for corners in self._rotation_corners
+        ]
 
-            self._rotation_axes[axis_i] = (
-                x,
-                y * cos(theta) + z * -sin(theta),
-                y * sin(theta) + z * cos(theta)
-            )
+    def update_points(self) -> None:
+        """Compute the position of every point on the screen, if anything has changed"""
+        if not self._points_changed:
+            return
 
-        for corner_i in range(0, len(self.corners)):
-            self.corners[corner_i].rotate_x(theta)
+        matrices = self._view @ self._transforms
 
-    def rotate_y(self, theta: float) -> None:
-        """Rotate cube around y"""
-        for axis_i in range(0, len(self._rotation_axes)):
-            x = self._rotation_axes[axis_i][0]
-            y = self._rotation_axes[axis_i][1]
-            z = self._rotation_axes[axis_i][2]
+        if self._turn_angle != 0:
+            rows = self._rotation_rows[self._turn_axis]
+            turn = rotation_matrix(self._turn_angle, self._rotation_axes[self._turn_axis])
+            matrices[rows] = self._view @ turn @ self._transforms[rows]
+
+        np.matmul(self._rest.reshape(8, 12, 3), matrices.transpose(0, 2, 1),
+                  out=self._points.reshape(8, 12, 3))
+        np.matmul(self._rest_normals, matrices.transpose(0, 2, 1), out=self._normals)
+        self._points_changed = False
+
+    def rotate_view(self, theta: float, vector: Tuple[float, float, float]) -> None:
+        """Rotate the whole cube on the screen around the given vector"""
+        if vector != self._view_vector:
+            self._view_prefix = self._view
+            self._view_vector = vector
+            self._view_angle = 0.0
 
-            self._rotation_axes[axis_i] = (
-                x * cos(theta) + z * sin(theta),
-                y,
-                x * -sin(theta) + z * cos(theta)
-            )
+        self._view_angle += theta
+        self._view = rotation_matrix(self._view_angle, vector) @ self._view_prefix
+        self._points_changed = True
 
-        for corner_i in range(0, len(self.corners)):
-            self.corners[corner_i].rotate_y(theta)
+    def rotate_x(self, theta: float) -> None:
+        """Rotate cube around x"""
+        self.rotate_view(theta, (1, 0, 0))
+
+    def rotate_y(self, theta: float) -> None:
+        """Rotate cube around y"""
+        self.rotate_view(theta, (0, 1, 0))
 
     def rotate_z(self, theta: float) -> None:
         """Rotate cube around z"""
-        for corner_i in range(0, len(self.corners)):
-            self.corners[corner_i].rotate_z(theta)
+        self.rotate_view(theta, (0, 0, 1))
 
     def rotate_whole_cube(self) -> None:
         """Rotate the whole rubik's cube"""
-        for corner_i in range(0, len(self.corners)):
-            self.corners[corner_i].relative_rotation(pi / 2, self._rotation_axes[1])
+        quarter_turn = np.rint(rotation_matrix(pi / 2, self._rotation_axes[1]))
+        self._transforms = quarter_turn @ self._transforms
+        self._points_changed = True
 
     def relative_rotation(self, theta: float, axis: int) -> None:
-        """Rotate cube around vector"""
-        for corner_i in range(0, len(self.corners)):
-            if corner_i in self._rotation_corners[axis]:
-                self.corners[corner_i].relative_rotation(theta, self._rotation_axes[axis])
+        """Rotate cube around vector
+
+        The rotation is only stored, and is applied to the points by update_points.
+        """
+        if axis != self._turn_axis and self._turn_angle != 0:
+            rows = self._rotation_rows[self._turn_axis]
+            turn = rotation_matrix(self._turn_angle, self._rotation_axes[self._turn_axis])
+            self._transforms[rows] = turn @ self._transforms[rows]
+            self._turn_angle = 0.0
+
+        self._turn_axis = axis
+        self._turn_angle += theta
+        self._points_changed = True
 
 
 if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['annotations', 'typing', 'math', 'pygame', 'python_ta.contracts'],
+        'extra-imports': ['annotations', 'functools', 'typing', 'math', 'numpy', 'pygame', 'state',
+                          'python_ta.contracts'],
         'allowed-io': [],
         'max-line-length': 100,
         'disable': ['E1136']
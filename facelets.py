@@ -0,0 +1,93 @@
+"""facelets
+
+Description
+===============================
+
+This Python module moves many 2 by 2 cubes at once. Each cube is a
+row of 24 sticker colours in a uint8 array, in the order used by
+bigcube.py, so a move is a single NumPy index of the whole array
+however many cubes it holds.
+
+Copyright and Usage Information
+===============================
+
+This file is Copyright (c) 2021 Caleb Sadler.
+"""
+from __future__ import annotations
+from functools import lru_cache
+from typing import Optional
+import numpy as np
+import bigcube
+import state
+
+NUM_STICKERS = 24
+
+
+@lru_cache(maxsize=None)
+def get_sources() -> np.ndarray:
+    """Return, for each axis, the sticker each sticker takes its colour from
+
+    The same array is returned for repeated calls, so it must not be changed.
+    """
+    sources, _ = bigcube.get_move_tables(2)
+    return np.stack(sources)
+
+
+def solved_batch(count: int) -> np.ndarray:
+    """Return count solved cubes"""
+    solved = np.repeat(np.arange(0, len(bigcube.FACES), dtype=np.uint8), 4)
+    return np.tile(solved, (count, 1))
+
+
+def apply_move(batch: np.ndarray, move: str, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Return every cube in the batch after the given move letter
+
+    If out is given, the result is written to it, and it must not be batch.
+    """
+    return np.take(batch, get_sources()[state.MOVES.index(move)], axis=1, out=out)
+
+
+def apply_sequence(batch: np.ndarray, moves: str) -> np.ndarray:
+    """Return every cube in the batch after each move letter in order"""
+    current = batch.copy()
+    spare = np.empty_like(batch)
+
+    for move in moves:
+        apply_move(current, move, spare)
+        current, spare = spare, current
+
+    return current
+
+
+def apply_axes(batch: np.ndarray, axes: np.ndarray) -> None:
+    """Move each cube in the batch around its own axis in axes, in place
+
+    axes holds one axis for each cube, and a negative axis leaves that cube alone.
+    """
+    sources = get_sources()
+    for axis in range(0, len(sources)):
+        chosen = axes == axis
+        batch[chosen] = batch[chosen][:, sources[axis]]
+
+
+def solved_mask(batch: np.ndarray) -> np.ndarray:
+    """Return whether each cube in the batch is solved, in any orientation"""
+    faces = batch.reshape(len(batch), len(bigcube.FACES), -1)
+    return (faces == faces[:, :, :1]).all(axis=(1, 2))
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['__future__', 'functools', 'typing', 'numpy', 'bigcube', 'state',
+                          'python_ta.contracts'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
+
+    import python_ta.contracts
+
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
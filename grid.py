@@ -0,0 +1,189 @@
+"""grid
+
+Description
+===============================
+
+This Python module shows many cubes at once, laid out in a grid.
+Each cube plays its own scrambles and solves over and over, so the
+grid can be used for races and for coaching displays.
+
+Every cube faces the same way on the screen, so while a cube is not
+turning, its geometry and the order its stickers are drawn in come
+from the cache in bigcube.py that all the cubes share. Only the cubes
+that moved since the last frame are drawn again.
+
+Copyright and Usage Information
+===============================
+
+This file is Copyright (c) 2021 Caleb Sadler.
+"""
+from __future__ import annotations
+from math import pi, sqrt
+from typing import Tuple
+import random
+import pygame
+import interaction
+import optimal
+import state
+from bigcube import BigCube
+
+# Seconds each cube waits after it is scrambled or solved
+PAUSE = 1.0
+
+# The number of random moves in a scramble, when it is not made from a random position
+SCRAMBLE_LENGTH = 40
+
+# The gap in pixels between the edge of each cell and the cube in it
+MARGIN = 6
+
+
+def get_layout(count: int, screen_size: Tuple[int, int]) -> Tuple[int, int]:
+    """Return the number of columns and rows that fit count cells on the screen with the
+    largest square in each cell"""
+    best = (1, count)
+    best_side = 0.0
+
+    for columns in range(1, count + 1):
+        rows = -(-count // columns)
+        side = min(screen_size[0] / columns, screen_size[1] / rows)
+        if side > best_side:
+            best = (columns, rows)
+            best_side = side
+
+    return best
+
+
+def make_scramble(size: int) -> str:
+    """Return a scramble for a cube of the given size
+
+    The 2 by 2 cube is scrambled to a random position when the distance table has been
+    generated, so that the reverse of the scramble is its shortest solution. Otherwise
+    the scramble is random moves, including turns of the whole cube so that every face
+    gets turned.
+    """
+    if size == 2 and optimal.has_table():
+        return interaction.make_reverse_algorithm(optimal.solve(
+            state.unrank_position(random.randrange(state.NUM_POSITIONS))))
+
+    return state.merge_turns(random.choice(state.MOVES) for _ in range(SCRAMBLE_LENGTH))
+
+
+class CubeGrid:
+    """A grid of cubes that each scramble and solve themselves
+
+    Instance Attributes
+        - cubes: the cubes, row by row
+        - speed: the angle each cube turns per second
+    """
+    # Private Instance Attributes:
+    #     - _cells: the area of the screen each cube is drawn in
+    #     - _move_strs: the moves each cube is playing
+    #     - _positions: the index in _move_strs of the move each cube is making
+    #     - _angles: how far each cube has turned its current move
+    #     - _waits: the seconds each cube has left to wait before moving again
+    #     - _solving: whether each cube is solving, rather than scrambling
+    cubes: list[BigCube]
+    speed: float
+    _cells: list[pygame.Rect]
+    _move_strs: list[str]
+    _positions: list[int]
+    _angles: list[float]
+    _waits: list[float]
+    _solving: list[bool]
+
+    def __init__(self, count: int, screen_size: Tuple[int, int], speed: float,
+                 size: int = 2) -> None:
+        """Initialize count solved cubes with size by size stickers on each face, laid out
+        to fill the screen"""
+        columns, rows = get_layout(count, screen_size)
+        width = screen_size[0] // columns
+        height = screen_size[1] // rows
+
+        # a cube of this length fits in its cell whichever way it faces
+        length = max(1, int((min(width, height) / 2 - MARGIN) / sqrt(3)))
+
+        self.cubes = []
+        self.speed = speed
+        self._cells = []
+
+        for i in range(0, count):
+            row, column = divmod(i, columns)
+            cell = pygame.Rect(column * width, row * height, width, height)
+            self._cells.append(cell)
+            self.cubes.append(BigCube((cell.centerx, cell.centery, 0), length, size))
+
+        self._move_strs = [''] * count
+        self._positions = [0] * count
+        self._angles = [0.0] * count
+        self._waits = [random.uniform(0, PAUSE) for _ in range(0, count)]
+        self._solving = [True] * count
+
+    def update(self, seconds: float) -> None:
+        """Move every cube on by the given number of seconds"""
+        for i in range(0, len(self.cubes)):
+            self._update_cube(i, seconds)
+
+    def draw(self, screen: pygame.Surface, full: bool = False) -> list[pygame.Rect]:
+        """Draw the cubes that moved since they were last drawn, or every cube if full is
+        True, returning the areas of the screen that were drawn"""
+        drawn = []
+
+        for i in range(0, len(self.cubes)):
+            cube = self.cubes[i]
+            if full or cube.has_changed():
+                # a solved cube is shown on yellow, like the cube in main.py
+                background = (255, 255, 0) if cube.check_solve() else (255, 255, 255)
+                screen.fill(background, self._cells[i])
+                cube.visualize(screen)
+                drawn.append(self._cells[i])
+
+        return drawn
+
+    def _update_cube(self, i: int, seconds: float) -> None:
+        """Move the cube with index i on by the given number of seconds"""
+        if self._waits[i] > 0:
+            self._waits[i] -= seconds
+            return
+
+        if self._positions[i] >= len(self._move_strs[i]):
+            self._start_moves(i)
+            return
+
+        axis = state.MOVES.index(self._move_strs[i][self._positions[i]])
+        step = min(self.speed * seconds, pi / 2 - self._angles[i])
+        self._angles[i] += step
+
+        if self._angles[i] >= pi / 2:
+            self.cubes[i].update_corners(axis)
+            self._positions[i] += 1
+            self._angles[i] = 0.0
+        else:
+            self.cubes[i].relative_rotation(step, axis)
+
+    def _start_moves(self, i: int) -> None:
+        """Start the next scramble or solve of the cube with index i, after a pause"""
+        if self._solving[i]:
+            self._move_strs[i] = make_scramble(self.cubes[i].size)
+        else:
+            self._move_strs[i] = interaction.make_reverse_algorithm(self._move_strs[i])
+
+        self._solving[i] = not self._solving[i]
+        self._positions[i] = 0
+        self._waits[i] = PAUSE
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['__future__', 'math', 'typing', 'random', 'pygame', 'interaction',
+                          'optimal', 'state', 'bigcube', 'python_ta.contracts'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
+
+    import python_ta.contracts
+
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
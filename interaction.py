@@ -12,76 +12,215 @@ Copyright and Usage Information
 This file is Copyright (c) 2020 Caleb Sadler.
 """
 from __future__ import annotations
+from collections import deque
 from math import pi
+from typing import Optional
 import random
 import pygame
+import movequeue
+import optimal
+import search
+import solvecache
+import state
 from cube import Cube
+from movequeue import MoveQueue
+from control import ControlServer
+from recording import RecorderGroup, Replay
 
+# Seconds the solve button may spend searching when there is no distance table
+SEARCH_BUDGET = 0.25
 
-def handle_rotation(cube: Cube, bools: dict, nums: dict) -> None:
-    """Handle calculations for rotating the cube"""
+# The most moves of a replay waiting to be animated at once
+REPLAY_AHEAD = 16
+
+# The most moves from control clients waiting to be animated at once
+CONTROL_AHEAD = 16
+
+
+def handle_rotation(cube: Cube, bools: dict, nums: dict,
+                    recorder: Optional[RecorderGroup] = None) -> None:
+    """Handle calculations for rotating the cube
+
+    Each move is recorded by recorder, if it is given, once it is finished.
+    """
     if nums['now_theta'] >= nums['theta_thresh']:
         nums['now_theta'] = 0
         nums['theta_thresh'] = 100
         bools['can_press'] = True
         if nums['axis'] >= 0:
             cube.update_corners(nums['axis'])
+            if recorder is not None:
+                recorder.record(nums['axis'])
         nums['axis'] = -10
     elif nums['axis'] >= 0:
-        nums['now_theta'] += nums['theta']
-        cube.relative_rotation(nums['theta'], nums['axis'])
+        cube.relative_rotation(get_step(nums), nums['axis'])
     elif nums['axis'] == -1:
-        nums['now_theta'] += nums['theta']
-        cube.rotate_x(nums['theta'])
+        cube.rotate_x(get_step(nums))
     elif nums['axis'] == -2:
-        nums['now_theta'] += nums['theta']
-        cube.rotate_x(-nums['theta'])
-
-
-def handle_key_input(cube: Cube, bools: dict, nums: dict, strs: dict, buttons: dict) -> None:
-    """Handle calculations for key input"""
-    pressed = pygame.key.get_pressed()
-
-    if bools['can_press'] and pressed[pygame.K_SPACE]:
-        bools['scramble'] = True
-        strs['scramble_str'] = get_scramble(buttons)
-    elif bools['can_press'] and not cube.check_solve() and pressed[pygame.K_s]:
-        bools['solve'] = True
-        strs['solve_str'] = get_base(cube)
-    elif bools['can_press'] and not bools['up_down'] and pressed[pygame.K_DOWN]:
-        nums['axis'] = -1
-        bools['up_down'] = True
-        bools['can_press'] = False
-        nums['theta_thresh'] = pi / 4
-    elif bools['can_press'] and bools['up_down'] and pressed[pygame.K_UP]:
-        nums['axis'] = -2
-        bools['up_down'] = False
+        cube.rotate_x(-get_step(nums))
+
+
+def get_step(nums: dict) -> float:
+    """Return the angle to rotate this frame, so that the rotation stops exactly at the
+    threshold"""
+    step = min(nums['theta'], nums['theta_thresh'] - nums['now_theta'])
+    nums['now_theta'] = min(nums['now_theta'] + nums['theta'], nums['theta_thresh'])
+
+    return step
+
+
+def get_speed(bools: dict, nums: dict) -> float:
+    """Return the angle turned per second, which is faster while scrambling, solving or
+    replaying"""
+    if bools['scramble'] or bools['solve'] or bools['replay']:
+        return nums['speed'] * nums['playback_speed']
+
+    return nums['speed']
+
+
+def fast_forward(cube: Cube, move_str: str, nums: dict,
+                 recorder: Optional[RecorderGroup] = None) -> str:
+    """Apply the moves that should not be animated straight to the cube, returning the rest
+
+    Only the last nums['animate_last'] moves are animated, or all of them if it is negative.
+    The skipped moves are applied to the cube's state and its geometry is rebuilt once.
+    """
+    if nums['animate_last'] < 0 or len(move_str) <= nums['animate_last']:
+        return move_str
+
+    split = len(move_str) - nums['animate_last']
+    cube.apply_sequence(move_str[:split])
+    if recorder is not None:
+        recorder.record_sequence(move_str[:split])
+
+    return move_str[split:]
+
+
+def is_idle(bools: dict, nums: dict, moves: MoveQueue, key_presses: deque,
+            server: Optional[ControlServer] = None) -> bool:
+    """Return whether nothing is moving, waiting to move or waiting to be drawn
+
+    Moves sent to the control server, if it is given, count as waiting to move, since
+    the event that would wake the loop for them may already have been taken.
+    """
+    return nums['axis'] == -10 and len(moves) == 0 and len(key_presses) == 0 \
+        and not bools['scramble'] and not bools['solve'] and not bools['replay'] \
+        and not bools['redraw'] and (server is None or not server.has_moves())
+
+
+def handle_key_input(cube: Cube, bools: dict, nums: dict, moves: MoveQueue, buttons: dict,
+                     key_presses: deque, recorder: Optional[RecorderGroup] = None) -> None:
+    """Handle the keys pressed since the last frame, in the order they were pressed
+
+    Each press of a move key queues exactly one move, even while the cube is turning,
+    and turning the cube while it is being solved stops the solve. Any other key waits
+    in key_presses, without holding up the move keys pressed after it, until the cube
+    stops turning and every move from keys, scrambles and solves is done. Moves from
+    replays and control clients are not waited for. Scrambling or solving is ignored
+    while the cube is already being scrambled or solved. A key whose moves do not fit
+    in the queue waits in key_presses until they do, along with every key after it.
+    """
+    waiting = []
+
+    while len(key_presses) > 0:
+        key = key_presses.popleft()
+        busy = bools['scramble'] or bools['solve']
+        still = bools['can_press'] and moves.count(movequeue.HIGH) == 0 \
+            and moves.count(movequeue.NORMAL) == 0 and waiting == []
+
+        if key in (pygame.K_UP, pygame.K_DOWN) and not still \
+                or key in (pygame.K_SPACE, pygame.K_s) and not busy and not still:
+            waiting.append(key)
+        elif key == pygame.K_SPACE and not busy:
+            if isinstance(cube, Cube):
+                # the cube may end up facing any way after a scramble
+                scramble_str = state.simplify_moves(get_scramble(buttons), False)
+            else:
+                scramble_str = state.merge_turns(get_random_scramble(buttons))
+            if len(scramble_str) > moves.space():
+                waiting.append(key)
+            else:
+                bools['scramble'] = True
+                moves.extend(fast_forward(cube, scramble_str, nums, recorder))
+        elif key == pygame.K_s and not busy and isinstance(cube, Cube) \
+                and not cube.check_solve():  # only the 2 by 2 cube can be solved
+            solve_str = state.simplify_moves(get_first_solve(cube))
+            if len(solve_str) > moves.space():
+                waiting.append(key)
+            else:
+                bools['solve'] = True
+                moves.extend(fast_forward(cube, solve_str, nums, recorder))
+        elif key == pygame.K_DOWN and not bools['up_down']:
+            nums['axis'] = -1
+            bools['up_down'] = True
+            bools['can_press'] = False
+            nums['theta_thresh'] = pi / 4
+        elif key == pygame.K_UP and bools['up_down']:
+            nums['axis'] = -2
+            bools['up_down'] = False
+            bools['can_press'] = False
+            nums['theta_thresh'] = pi / 4
+        else:
+            for button in buttons:
+                if key == buttons[button][0]:
+                    if bools['solve']:  # the rest of the solve is no longer right
+                        moves.clear(movequeue.NORMAL)
+                        nums['solve_step'] = 0
+                        bools['solve'] = False
+                    if not moves.push(button, movequeue.HIGH):
+                        waiting.append(key)
+                    break
+
+    key_presses.extend(waiting)
+
+
+def handle_moves(bools: dict, nums: dict, moves: MoveQueue, buttons: dict) -> None:
+    """Start turning the cube with the next move in the queue, once the last turn is done"""
+    if bools['can_press'] and len(moves) > 0:
+        nums['axis'] = buttons[moves.pop()][1]
         bools['can_press'] = False
-        nums['theta_thresh'] = pi / 4
-    else:
-        for button in buttons:
-            if bools['can_press'] and pressed[buttons[button][0]]:
-                nums['axis'] = buttons[button][1]
-                bools['can_press'] = False
-                nums['theta_thresh'] = pi / 2
-                break
+        nums['theta_thresh'] = pi / 2
 
 
-def handle_scramble(bools: dict, nums: dict, strs: dict, buttons: dict) -> None:
+def handle_scramble(bools: dict, moves: MoveQueue) -> None:
     """Handle calculations for scrambling the cube"""
-    if strs['scramble_str'] == '':
-        bools['can_press'] = False
+    if moves.count(movequeue.NORMAL) == 0:
         bools['scramble'] = False
 
-    if bools['can_press']:
-        nums['axis'] = buttons[strs['scramble_str'][0]][1]
-        bools['can_press'] = False
-        strs['scramble_str'] = strs['scramble_str'][1:]
-        nums['theta_thresh'] = pi / 2
+
+def handle_replay(bools: dict, moves: MoveQueue, replay: Replay) -> None:
+    """Queue the next moves of a replay, keeping only a few of them waiting at a time"""
+    if replay.position < len(replay):
+        count = min(REPLAY_AHEAD - moves.count(movequeue.LOW), moves.space(movequeue.LOW))
+        moves.extend(replay.read(max(count, 0)), movequeue.LOW)
+    elif moves.count(movequeue.LOW) == 0:
+        bools['replay'] = False
+
+
+def handle_control(moves: MoveQueue, server: ControlServer) -> None:
+    """Queue the next moves sent by the clients of the control server, keeping only a few
+    of them waiting at a time and leaving the rest with the server"""
+    count = min(CONTROL_AHEAD - moves.count(movequeue.LOW), moves.space(movequeue.LOW))
+    moves.extend(server.take_moves(max(count, 0)), movequeue.LOW)
 
 
 def get_scramble(buttons: dict) -> str:
-    """Generate a string to scramble the cube"""
+    """Generate a string to scramble the cube
+
+    Every position of the cube is equally likely after the scramble. The scramble
+    is the reverse of the shortest solution to a random position, or random moves if
+    no solution can be found quickly.
+    """
+    position = state.unrank_position(random.randrange(state.NUM_POSITIONS))
+    solve_str = find_solve(position)
+    if solve_str is not None:
+        return make_reverse_algorithm(solve_str)
+
+    return get_random_scramble(buttons)
+
+
+def get_random_scramble(buttons: dict) -> str:
+    """Generate a string of random moves to scramble the cube"""
     scramble_str = ''
 
     for _ in range(0, 40):
@@ -91,28 +230,63 @@ def get_scramble(buttons: dict) -> str:
 
 
 def handle_solve(cube: Cube, solved_cube: Cube, vals: list) -> None:
-    """Handle calculations for solving the cube"""
+    """Handle calculations for solving the cube
+
+    The next step of the solve is left for a later frame if its moves do not fit in
+    the queue yet.
+    """
     bools = vals[0]
     nums = vals[1]
-    strs = vals[2]
-    buttons = vals[3]
-    if strs['solve_str'] == '':
+    moves = vals[2]
+    recorder = vals[3]
+    if moves.count(movequeue.NORMAL) == 0:
         if cube.check_solve():  # if the cube is solved, reset and do nothing
             nums['solve_step'] = 0
             bools['solve'] = False
-            bools['can_press'] = False
         elif bools['can_press'] and nums['solve_step'] == 0:  # orient the base corner
-            nums['solve_step'] += 1
-            strs['solve_str'] = get_orient(cube)
+            solve_str = state.simplify_moves(get_orient(cube))
+            if len(solve_str) <= moves.space():
+                nums['solve_step'] += 1
+                moves.extend(fast_forward(cube, solve_str, nums, recorder))
         elif bools['can_press'] and nums['solve_step'] >= 1:  # solve the cube
-            nums['solve_step'] += 1
-            strs['solve_str'] = get_solve(cube, solved_cube)
+            solve_str = state.simplify_moves(get_solve(cube, solved_cube))
+            if len(solve_str) <= moves.space():
+                nums['solve_step'] += 1
+                moves.extend(fast_forward(cube, solve_str, nums, recorder))
 
-    if bools['can_press']:
-        nums['axis'] = buttons[strs['solve_str'][0]][1]
-        bools['can_press'] = False
-        strs['solve_str'] = strs['solve_str'][1:]
-        nums['theta_thresh'] = pi / 2
+
+def get_first_solve(cube: Cube) -> str:
+    """Generate the first string for solving the cube
+
+    This is a full solution when one can be found quickly, and otherwise
+    the string to move the base corner to the center.
+    """
+    solve_str = find_solve(cube.get_state())
+    if solve_str is None:
+        return get_base(cube)
+
+    return solve_str
+
+
+def find_solve(current: state.CubeState) -> Optional[str]:
+    """Return the shortest string that solves the given state, or None if it cannot be
+    found quickly
+
+    Solutions are remembered, so positions that have been solved before are solved instantly.
+    """
+    cache = solvecache.get_cache()
+    solve_str = cache.get(current)
+
+    if solve_str is None:
+        if optimal.has_table():
+            solve_str = optimal.solve(current)
+        else:
+            solve_str = search.solve(current, SEARCH_BUDGET)
+
+        if solve_str is not None:
+            cache.put(current, solve_str)
+
+    return solve_str
 
 
 def get_base(cube: Cube) -> str:
@@ -245,7 +419,9 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['__future', 'math', 'random', 'pygame', 'cube', 'python_ta.contracts'],
+        'extra-imports': ['__future', 'collections', 'math', 'typing', 'random', 'pygame',
+                          'movequeue', 'optimal', 'search', 'solvecache', 'state', 'control',
+                          'cube', 'recording', 'python_ta.contracts'],
         'allowed-io': [],
         'max-line-length': 100,
         'disable': ['E1136']
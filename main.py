@@ -4,7 +4,8 @@ Description
 ===============================
 
 This Python module is for running the project.
-It will display a 2 by 2 rubik's cube.
+It will display a 2 by 2 rubik's cube, or a grid of cubes that
+scramble and solve themselves.
 
 Copyright and Usage Information
 ===============================
@@ -12,11 +13,20 @@ Copyright and Usage Information
 This file is Copyright (c) 2021 Caleb Sadler.
 """
 from __future__ import annotations
+from collections import deque
 from math import pi
+from typing import Optional
+import argparse
 import pygame
+import control
 import paint
 import interaction
+import recording
+import timing
+from bigcube import BigCube
+from grid import CubeGrid
 from cube import Cube
+from movequeue import MoveQueue
 
 
 def initialize_screen(screen_size: tuple[int, int]) -> pygame.Surface:
@@ -29,7 +39,7 @@ def initialize_screen(screen_size: tuple[int, int]) -> pygame.Surface:
 
     pygame.event.clear()
     pygame.event.set_blocked(None)
-    pygame.event.set_allowed([pygame.QUIT])
+    pygame.event.set_allowed([pygame.QUIT, pygame.VIDEOEXPOSE, pygame.KEYDOWN])
 
     return screen
 
@@ -37,34 +47,114 @@ def initialize_screen(screen_size: tuple[int, int]) -> pygame.Surface:
 SCREEN_WIDTH = 1000
 SCREEN_HEIGHT = 600
 
+# Seconds taken by each quarter turn
+TURN_TIME = 0.4
+
+# Most frames drawn per second
+FPS = 60
+
+
+def handle_event(event: pygame.event.Event, bools: dict,
+                 key_presses: Optional[deque] = None) -> None:
+    """Handle a single pygame event
+
+    If key_presses is given, every key pressed is added to it, so that no press is missed.
+    """
+    if event.type == pygame.QUIT:
+        bools['run'] = False
+    elif event.type == pygame.VIDEOEXPOSE:
+        bools['redraw'] = True
+    elif event.type == pygame.KEYDOWN and key_presses is not None:
+        key_presses.append(event.key)
+
+
+def run_sim(turn_time: float = TURN_TIME, fps: int = FPS,
+            timer: Optional[timing.FrameTimer] = None, playback_speed: float = 1.0,
+            animate_last: int = -1, record_path: Optional[str] = None,
+            replay_path: Optional[str] = None, replay_from: int = 0, size: int = 2,
+            serve_port: Optional[int] = None, serve_path: Optional[str] = None) -> None:
+    """Run simulation of 3d cube
+
+    Turns take turn_time seconds however fast the computer is, and at most fps
+    frames are drawn each second. While nothing is moving, the loop sleeps until
+    the next event.
+
+    Scrambles and solves play back playback_speed times faster than other turns.
+    If animate_last is not negative, only the last animate_last turns of each
+    scramble or solve are animated, and the rest are applied instantly.
+
+    If a timer is given, each phase of every frame is timed, and the times are
+    shown in the corner of the window.
+
+    If record_path is given, every move is recorded to that file. If replay_path
+    is given, the recording in that file is played back, starting after its first
+    replay_from moves. Replays also play back playback_speed times faster.
+
+    If serve_port or serve_path is given, other programs can drive the cube through
+    a control server on that local port or Unix socket.
+
+    The cube has size by size stickers on each face. Only the 2 by 2 cube can be
+    solved, recorded, replayed or driven by other programs.
+    """
+    if playback_speed <= 0:
+        raise ValueError('the playback speed must be more than 0')
+
+    serve = serve_port is not None or serve_path is not None
+    if size != 2 and (record_path is not None or replay_path is not None or serve):
+        raise ValueError('only the 2 by 2 cube can be recorded, replayed or served')
 
-def run_sim() -> None:
-    """Run simulation of 3d cube"""
     screen = initialize_screen((SCREEN_WIDTH, SCREEN_HEIGHT))
-    cube1 = Cube((SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2, 0), 70)
+    if size == 2:
+        cube1 = Cube((SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2, 0), 70)
+    else:
+        cube1 = BigCube((SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2, 0), 70, size)
     solved_cube = Cube((SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2, 0), 70)
-    keys = paint.make_keys()
+    overlay = paint.make_overlay((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    replay = None
+    if replay_path is not None:
+        replay = recording.Replay(replay_path)
+        cube1.set_state(replay.seek(min(replay_from, len(replay))))
+
+    # everything that is told about each move once it is made
+    recorders = recording.RecorderGroup([])
+    if record_path is not None:
+        recorders.recorders.append(recording.Recorder(record_path, cube1.get_state()))
+
+    server = None
+    if serve:
+        server = control.ControlServer(cube1.get_state(), path=serve_path,
+                                       port=control.PORT if serve_port is None else serve_port)
+        server.start()
+        recorders.recorders.append(server)
+        pygame.event.set_allowed(control.WAKE_EVENT)
 
     bools = {
         'run': True,
         'scramble': False,
         'solve': False,
         'can_press': True,
-        'up_down': True
+        'up_down': True,
+        'redraw': True,
+        'solved': False,
+        'replay': replay is not None
     }
 
     nums = {
-        'theta': pi / 500,
+        'speed': (pi / 2) / turn_time,
+        'theta': 0,
         'now_theta': 0,
         'axis': -10,
         'theta_thresh': 100,
-        'solve_step': 0
+        'solve_step': 0,
+        'playback_speed': playback_speed,
+        'animate_last': animate_last
     }
 
-    strs = {
-        'scramble_str': '',
-        'solve_str': ''
-    }
+    moves = MoveQueue()
+
+    # the keys pressed that have not been handled yet, from the first pressed to the last
+    key_presses = deque()
 
     buttons = {
         'n': (pygame.K_n, 0),
@@ -77,23 +167,161 @@ def run_sim() -> None:
         'r': (pygame.K_RIGHT, 7),
     }
 
+    clock = pygame.time.Clock()
+
     while bools['run']:
+        nums['theta'] = interaction.get_speed(bools, nums) * clock.tick(fps) / 1000
+        if timer is not None:
+            timer.start_frame()
+
+        interaction.handle_key_input(cube1, bools, nums, moves, buttons, key_presses, recorders)
+        if server is not None:    # if other programs can send moves
+            interaction.handle_control(moves, server)
         if bools['scramble']:    # if the scramble button is pressed
-            interaction.handle_scramble(bools, nums, strs, buttons)
-        elif bools['solve']:     # if the solve button is pressed
-            interaction.handle_solve(cube1, solved_cube, [bools, nums, strs, buttons])
-        else:   # otherwise check for rotation input
-            interaction.handle_key_input(cube1, bools, nums, strs, buttons)
+            interaction.handle_scramble(bools, moves)
+        if bools['solve']:     # if the solve button is pressed
+            interaction.handle_solve(cube1, solved_cube, [bools, nums, moves, recorders])
+        if bools['replay']:    # if a recording is being played back
+            interaction.handle_replay(bools, moves, replay)
+        interaction.handle_moves(bools, nums, moves, buttons)
+        if timer is not None:
+            timer.mark('input')
+
+        interaction.handle_rotation(cube1, bools, nums, recorders)
+        if timer is not None:
+            timer.mark('rotation')
 
-        interaction.handle_rotation(cube1, bools, nums)
-        paint.draw_all(screen, cube1, keys)
+        paint.draw_all(screen, cube1, overlay, bools, timer)
 
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                bools['run'] = False
+            handle_event(event, bools, key_presses)
+
+        if timer is not None:
+            timer.mark('events')
+            timer.end_frame()
+            timer.draw_hud(screen)
+
+        if bools['run'] and interaction.is_idle(bools, nums, moves, key_presses, server):
+            handle_event(pygame.event.wait(), bools, key_presses)
+            clock.tick()  # so the time spent waiting is not animated
+
+    recorders.close()
+    if replay is not None:
+        replay.close()
+
+    pygame.display.quit()
+
+
+def run_grid(count: int, turn_time: float = TURN_TIME, fps: int = FPS,
+             timer: Optional[timing.FrameTimer] = None, size: int = 2) -> None:
+    """Run a grid of count cubes that each scramble and solve themselves
+
+    Each cube has size by size stickers on each face, and its turns take turn_time
+    seconds. Only the cubes that moved are drawn each frame.
+
+    If a timer is given, each phase in timing.GRID_PHASES of every frame is timed, and
+    the times are shown in the corner of the window.
+    """
+    screen = initialize_screen((SCREEN_WIDTH, SCREEN_HEIGHT))
+    cube_grid = CubeGrid(count, (SCREEN_WIDTH, SCREEN_HEIGHT), (pi / 2) / turn_time, size)
+    bools = {'run': True, 'redraw': True}
+    clock = pygame.time.Clock()
+
+    while bools['run']:
+        seconds = clock.tick(fps) / 1000
+        if timer is not None:
+            timer.start_frame()
+
+        cube_grid.update(seconds)
+        if timer is not None:
+            timer.mark('rotation')
+
+        drawn = cube_grid.draw(screen, bools['redraw'])
+        if timer is not None:
+            timer.mark('visualize')
+
+        if bools['redraw']:
+            pygame.display.flip()
+        elif drawn != []:
+            pygame.display.update(drawn)
+        bools['redraw'] = False
+        if timer is not None:
+            timer.mark('display')
+
+        for event in pygame.event.get():
+            handle_event(event, bools)
+
+        if timer is not None:
+            timer.mark('events')
+            timer.end_frame()
+            timer.draw_hud(screen)
 
     pygame.display.quit()
 
 
 if __name__ == "__main__":
-    run_sim()
+    parser = argparse.ArgumentParser(description="Display a 2 by 2 Rubik's cube.")
+    parser.add_argument('--timing', action='store_true',
+                        help='show how long each part of a frame takes')
+    parser.add_argument('--timing-csv', metavar='PATH',
+                        help='also write the time of every frame to a CSV file')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='how many times faster scrambles and solves are animated')
+    parser.add_argument('--animate-last', type=int, default=-1, metavar='N',
+                        help='only animate the last N turns of scrambles and solves')
+    parser.add_argument('--instant', action='store_const', const=0, dest='animate_last',
+                        help='apply scrambles and solves without animating them')
+    parser.add_argument('--record', metavar='PATH',
+                        help='record every move to a file')
+    parser.add_argument('--replay', metavar='PATH',
+                        help='play back a recording')
+    parser.add_argument('--replay-from', type=int, default=0, metavar='N',
+                        help='start the replay after its first N moves')
+    parser.add_argument('--size', type=int, default=2, metavar='N',
+                        help='show an N by N cube, which cannot be solved, recorded, '
+                             'replayed or served unless N is 2')
+    parser.add_argument('--serve', type=int, nargs='?', const=control.PORT, metavar='PORT',
+                        help='let other programs drive the cube through a local port, '
+                             f'{control.PORT} by default')
+    parser.add_argument('--serve-unix', metavar='PATH',
+                        help='let other programs drive the cube through a Unix socket')
+    parser.add_argument('--grid', type=int, metavar='COUNT',
+                        help='show COUNT cubes that scramble and solve themselves')
+    options = parser.parse_args()
+
+    if options.size < 2:
+        parser.error('the cube must be at least 2 by 2')
+    if options.speed <= 0:
+        parser.error('the speed must be more than 0')
+    if options.animate_last < -1:
+        parser.error('the number of turns to animate cannot be negative')
+    if options.size != 2 and (options.record is not None or options.replay is not None
+                              or options.serve is not None or options.serve_unix is not None):
+        parser.error('only the 2 by 2 cube can be recorded, replayed or served')
+    if options.grid is not None and options.grid < 1:
+        parser.error('the grid must have at least one cube')
+    if options.grid is not None and (options.record is not None or options.replay is not None
+                                     or options.replay_from != 0 or options.serve is not None
+                                     or options.serve_unix is not None
+                                     or options.animate_last != -1):
+        parser.error('a grid cannot be recorded, replayed, served or skip animations')
+
+    frame_timer = None
+    if (options.timing or options.timing_csv is not None) and options.grid is not None:
+        frame_timer = timing.FrameTimer(options.timing_csv, phases=timing.GRID_PHASES)
+    elif options.timing or options.timing_csv is not None:
+        frame_timer = timing.FrameTimer(options.timing_csv)
+
+    try:
+        if options.grid is not None:
+            run_grid(options.grid, TURN_TIME / options.speed, timer=frame_timer,
+                     size=options.size)
+        else:
+            run_sim(timer=frame_timer, playback_speed=options.speed,
+                    animate_last=options.animate_last, record_path=options.record,
+                    replay_path=options.replay, replay_from=options.replay_from,
+                    size=options.size, serve_port=options.serve,
+                    serve_path=options.serve_unix)
+    finally:
+        if frame_timer is not None:
+            frame_timer.close()
@@ -0,0 +1,136 @@
+"""movequeue
+
+Description
+===============================
+
+This Python module is a queue of moves waiting to be animated.
+Keys, scrambles, solves and any other source of moves all add to
+the same queue, and the simulation takes one move at a time from it.
+
+Copyright and Usage Information
+===============================
+
+This file is Copyright (c) 2021 Caleb Sadler.
+"""
+from __future__ import annotations
+from collections import deque
+from typing import Iterable, Optional
+
+# Priorities of moves, where moves with a higher priority are taken first
+LOW = 0      # moves from scripts and replays
+NORMAL = 1   # scrambles and solves
+HIGH = 2     # keys pressed by the user
+
+# The most moves a queue holds unless told otherwise
+MAX_SIZE = 10000
+
+# The room in a queue that low priority moves cannot take, so it is always there for
+# keys, scrambles and solves, unless told otherwise
+RESERVED = 1000
+
+
+class MoveQueue:
+    """A bounded queue of move letters with priorities
+
+    Moves of the same priority are taken in the order they were added. Adding
+    and taking a move both take constant time. Low priority moves can only fill
+    the queue up to max_size - reserved, so however many of them are waiting,
+    there is room for higher priority moves.
+
+    Instance Attributes
+        - max_size: the most moves the queue can hold at once
+        - reserved: the room that only moves above low priority can take
+
+    Representation Invariants:
+        - 0 <= self.reserved <= self.max_size
+    """
+    # Private Instance Attributes:
+    #     - _queues: the moves waiting at each priority
+    #     - _size: the total number of moves waiting
+    max_size: int
+    reserved: int
+    _queues: list[deque]
+    _size: int
+
+    def __init__(self, max_size: int = MAX_SIZE, reserved: int = RESERVED) -> None:
+        """Initialize a new empty queue
+
+        Preconditions:
+            - 0 <= reserved <= max_size
+        """
+        self.max_size = max_size
+        self.reserved = reserved
+        self._queues = [deque() for _ in range(LOW, HIGH + 1)]
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Return the number of moves waiting"""
+        return self._size
+
+    def space(self, priority: int = NORMAL) -> int:
+        """Return how many more moves with the given priority can be added before the
+        queue is full"""
+        limit = self.max_size - self.reserved if priority == LOW else self.max_size
+        return max(limit - self._size, 0)
+
+    def push(self, move: str, priority: int = NORMAL) -> bool:
+        """Add a move with the given priority, returning False if the queue is full"""
+        if self.space(priority) == 0:
+            return False
+
+        self._queues[priority].append(move)
+        self._size += 1
+        return True
+
+    def extend(self, moves: Iterable[str], priority: int = NORMAL) -> int:
+        """Add each move in order until the queue is full, returning how many were added"""
+        added = 0
+        for move in moves:
+            if not self.push(move, priority):
+                break
+            added += 1
+
+        return added
+
+    def pop(self) -> str:
+        """Remove and return the next move, taking the highest priority moves first
+
+        Preconditions:
+            - len(self) > 0
+        """
+        for queue in reversed(self._queues):
+            if queue:
+                self._size -= 1
+                return queue.popleft()
+
+        raise IndexError('pop from an empty move queue')
+
+    def count(self, priority: int) -> int:
+        """Return the number of moves waiting with the given priority"""
+        return len(self._queues[priority])
+
+    def clear(self, priority: Optional[int] = None) -> None:
+        """Remove every move with the given priority, or every move if priority is None"""
+        if priority is None:
+            for queue in self._queues:
+                queue.clear()
+            self._size = 0
+        else:
+            self._size -= len(self._queues[priority])
+            self._queues[priority].clear()
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['__future__', 'collections', 'typing', 'python_ta.contracts'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
+
+    import python_ta.contracts
+
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
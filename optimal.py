@@ -0,0 +1,161 @@
+"""optimal
+
+Description
+===============================
+
+This Python module solves the 2 by 2 Rubik's cube in the fewest
+possible quarter turns. It uses a table with the distance of every
+position from the solved cube, which is generated once by calling
+generate_table() and is then memory-mapped from disk.
+
+Copyright and Usage Information
+===============================
+
+This file is Copyright (c) 2021 Caleb Sadler.
+"""
+from __future__ import annotations
+from array import array
+from itertools import permutations, product
+from operator import itemgetter
+from typing import Optional, Tuple
+import mmap
+import os
+import state
+from state import CubeState
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'distances.bin')
+
+# The face turns, which never move the last slot
+FACE_MOVES = state.MOVES[:6]
+
+NUM_POSITIONS = state.NUM_POSITIONS
+
+_UNSEEN = 255
+
+_TABLES: Optional[Tuple[list[array], list[array]]] = None
+_DISTANCES: dict[str, mmap.mmap] = {}
+
+
+def has_table(path: str = TABLE_PATH) -> bool:
+    """Return whether the distance table has been generated"""
+    return os.path.isfile(path) and os.path.getsize(path) == NUM_POSITIONS
+
+
+def generate_table(path: str = TABLE_PATH) -> None:
+    """Write the distance from the solved cube of every position to the given path
+
+    This searches every position of the cube, so it takes a while and only
+    needs to be done once.
+    """
+    perm_table, twist_table = face_tables()
+    distances = bytearray([_UNSEEN]) * NUM_POSITIONS
+    distances[0] = 0
+    frontier = [0]
+    depth = 0
+
+    while frontier != []:
+        depth += 1
+        new_frontier = []
+
+        for index in frontier:
+            perm, twist = divmod(index, 729)
+            for axis in range(0, len(FACE_MOVES)):
+                new_index = perm_table[axis][perm] * 729 + twist_table[axis][twist]
+                if distances[new_index] == _UNSEEN:
+                    distances[new_index] = depth
+                    new_frontier.append(new_index)
+
+        frontier = new_frontier
+
+    with open(path, 'wb') as file:
+        file.write(distances)
+
+
+def solve(current: CubeState, path: str = TABLE_PATH) -> str:
+    """Return the shortest string of face turns that solves the given state"""
+    distances = _load_table(path)
+    perm_table, twist_table = face_tables()
+    perm, twist = position(state.fix_last_corner(current))
+    solve_str = ''
+
+    while distances[perm * 729 + twist] != 0:
+        current_distance = distances[perm * 729 + twist]
+        for axis in range(0, len(FACE_MOVES)):
+            new_perm = perm_table[axis][perm]
+            new_twist = twist_table[axis][twist]
+            if distances[new_perm * 729 + new_twist] < current_distance:
+                solve_str += FACE_MOVES[axis]
+                perm, twist = new_perm, new_twist
+                break
+
+    return solve_str
+
+
+def distance(current: CubeState, path: str = TABLE_PATH) -> int:
+    """Return the fewest quarter turns needed to solve the given state"""
+    perm, twist = position(state.fix_last_corner(current))
+    return _load_table(path)[perm * 729 + twist]
+
+
+def _load_table(path: str) -> mmap.mmap:
+    """Return the memory-mapped distance table, opening it if needed"""
+    if path not in _DISTANCES:
+        with open(path, 'rb') as file:
+            _DISTANCES[path] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return _DISTANCES[path]
+
+
+def position(current: CubeState) -> Tuple[int, int]:
+    """Return the permutation and twist coordinates of a state with the last slot solved
+
+    The permutation coordinate is the rank of the corners in the first 7 slots,
+    and the twist coordinate is the twist of the first 6 slots in base 3, since
+    the twist of the seventh slot follows from the others.
+    """
+    pieces, twists = current.corners()
+    return state.rank_permutation(pieces[:7]), state.encode_twist(twists[:6])
+
+
+def face_tables() -> Tuple[list[array], list[array]]:
+    """Return the move tables of the face turns on the reduced coordinates"""
+    global _TABLES
+
+    if _TABLES is not None:
+        return _TABLES
+
+    perms = list(permutations(range(0, 7)))
+    perm_index = {perms[i]: i for i in range(0, len(perms))}
+    twists = [twist + ((-sum(twist)) % 3,) for twist in product(range(0, 3), repeat=6)]
+
+    perm_table = []
+    twist_table = []
+
+    for axis in range(0, len(FACE_MOVES)):
+        get_sources = itemgetter(*state.MOVE_SOURCES[axis][:7])
+        added = state.MOVE_TWISTS[axis]
+        perm_table.append(array('H', [perm_index[get_sources(p)] for p in perms]))
+        twist_table.append(array('H', [
+            state.encode_twist([(t + d) % 3 for t, d in zip(get_sources(twist), added)][:6])
+            for twist in twists
+        ]))
+
+    _TABLES = (perm_table, twist_table)
+    return _TABLES
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['__future__', 'array', 'itertools', 'operator', 'typing', 'mmap',
+                          'os', 'state', 'python_ta.contracts'],
+        'allowed-io': ['generate_table', '_load_table'],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
+
+    import python_ta.contracts
+
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
@@ -11,9 +11,47 @@ Copyright and Usage Information
 
 This file is Copyright (c) 2020 Caleb Sadler.
 """
-from typing import Tuple
+from functools import lru_cache
+from typing import Optional, Tuple
+import os
+import zlib
 import pygame
 import cube
+import timing
+
+# The font the keys are written in, and its size
+FONT = ('inconsolata', 45)
+
+# The colours of the box behind each key, and of its outline
+BOX_COLOURS = ((100, 100, 250), (0, 0, 0))
+
+# The text of each key, and the centre of the screen it is drawn at
+KEYS = [
+    ('T', (440, 140)),
+    ('Y', (560, 140)),
+    ('F', (325, 240)),
+    ('V', (325, 360)),
+    ('J', (675, 240)),
+    ('N', (675, 360)),
+    ('UP KEY', (500, 50)),
+    ('DOWN KEY', (500, 500)),
+    ('LEFT KEY', (120, 300)),
+    ('RIGHT KEY', (880, 300)),
+    ('S = solve', (100, 100)),
+    ('Space = scramble', (800, 100))
+]
+
+# Where the rendered key overlay is saved for each screen size. The name includes a
+# checksum of the keys and how they are drawn, so an overlay saved before any of them
+# changed is never loaded.
+OVERLAY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'overlay_{}x{}_{:08x}.png')
+
+
+@lru_cache(maxsize=None)
+def get_font() -> pygame.font.Font:
+    """Return the font used for the keys, looking it up only the first time"""
+    return pygame.font.SysFont(*FONT)
 
 
 def make_text(text: str, pos: tuple[int, int]) -> \
@@ -22,8 +60,7 @@ def make_text(text: str, pos: tuple[int, int]) -> \
 
     pos represents the *center* of the text.
     """
-    font = pygame.font.SysFont('inconsolata', 45)
-    text_surface = font.render(text, True, (0, 0, 0))
+    text_surface = get_font().render(text, True, (0, 0, 0))
     width, height = text_surface.get_size()
     x_offset = 7
     y_offset = 5
@@ -37,48 +74,95 @@ def make_text(text: str, pos: tuple[int, int]) -> \
 
 def make_keys() -> list:
     """Return  the text objects and rectangles for drawing"""
-    return [
-        make_text('T', (440, 140)),
-        make_text('Y', (560, 140)),
-        make_text('F', (325, 240)),
-        make_text('V', (325, 360)),
-        make_text('J', (675, 240)),
-        make_text('N', (675, 360)),
-        make_text('UP KEY', (500, 50)),
-        make_text('DOWN KEY', (500, 500)),
-        make_text('LEFT KEY', (120, 300)),
-        make_text('RIGHT KEY', (880, 300)),
-        make_text('S = solve', (100, 100)),
-        make_text('Space = scramble', (800, 100))
-    ]
+    return [make_text(text, pos) for text, pos in KEYS]
 
 
 def draw_keys(screen: pygame.Surface, keys: list) -> None:
     """Draw all the key inputs for the user to easily use the program"""
     for key in keys:
-        pygame.draw.rect(screen, (100, 100, 250), key[2], 0)
-        pygame.draw.rect(screen, (0, 0, 0), key[2], 3)
+        pygame.draw.rect(screen, BOX_COLOURS[0], key[2], 0)
+        pygame.draw.rect(screen, BOX_COLOURS[1], key[2], 3)
         screen.blit(key[0], key[1])
 
 
-def draw_all(screen: pygame.Surface, cube1: cube.Cube, keys: list) -> None:
-    """Draw all the necessary information to the screen"""
-    if cube1.check_solve():  # if the cube is solved make background yellow
-        screen.fill((255, 255, 0))
+def make_overlay(screen_size: tuple[int, int]) -> pygame.Surface:
+    """Return a transparent surface with all the keys drawn on it
+
+    The overlay is saved to disk the first time, so later runs with the same
+    screen size can load it without using any fonts.
+    """
+    checksum = zlib.crc32(repr((FONT, BOX_COLOURS, KEYS)).encode())
+    path = OVERLAY_PATH.format(screen_size[0], screen_size[1], checksum)
+
+    if os.path.isfile(path):
+        try:
+            return pygame.image.load(path).convert_alpha()
+        except pygame.error:  # the saved overlay is unreadable, so render it again
+            pass
+
+    overlay = pygame.Surface(screen_size, pygame.SRCALPHA)
+    draw_keys(overlay, make_keys())
+
+    try:
+        temp_path = path[:-len('.png')] + '.tmp.png'
+        pygame.image.save(overlay, temp_path)
+        os.replace(temp_path, path)
+    except (pygame.error, OSError):  # the overlay still works without being saved
+        pass
+
+    return overlay.convert_alpha()
+
+
+def draw_all(screen: pygame.Surface, cube1: cube.Cube, overlay: pygame.Surface,
+             bools: dict, timer: Optional[timing.FrameTimer] = None) -> None:
+    """Draw all the necessary information to the screen
+
+    Nothing is drawn if the cube has not changed since the last frame. Otherwise
+    only the area around the cube is updated, unless the whole screen needs to be
+    redrawn or the background colour changes.
+
+    If a timer is given, the time spent on each part of drawing is marked on it.
+    """
+    if not bools['redraw'] and not cube1.has_changed():
+        return
+
+    solved = cube1.check_solve()
+
+    if solved:  # if the cube is solved make background yellow
+        background = (255, 255, 0)
     else:  # otherwise make background white
-        screen.fill((255, 255, 255))
+        background = (255, 255, 255)
 
+    full = bools['redraw'] or solved != bools['solved']
+    rect = screen.get_rect() if full else cube1.get_bounds()
+
+    screen.fill(background, rect)
     cube1.visualize(screen)
-    draw_keys(screen, keys)
-    pygame.display.flip()
+    if timer is not None:
+        timer.mark('visualize')
+
+    screen.blit(overlay, rect, rect)
+    if timer is not None:
+        timer.mark('overlay')
+
+    if full:
+        pygame.display.flip()
+    else:
+        pygame.display.update(rect)
+    if timer is not None:
+        timer.mark('display')
+
+    bools['redraw'] = False
+    bools['solved'] = solved
 
 
 if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['typing', 'pygame', 'cube', 'python_ta.contracts'],
-        'allowed-io': [],
+        'extra-imports': ['functools', 'typing', 'os', 'zlib', 'pygame', 'cube', 'timing',
+                          'python_ta.contracts'],
+        'allowed-io': ['make_overlay'],
         'max-line-length': 100,
         'disable': ['E1136']
     })
@@ -0,0 +1,240 @@
+"""recording
+
+Description
+===============================
+
+This Python module records the moves made on the cube to a compact
+binary file, and replays them later from any point.
+
+A recording starts with a header, followed by blocks that each hold
+a keyframe with the state of the cube, then the next KEYFRAME_INTERVAL
+moves. Every record has a fixed size, so the block holding any move
+can be found without reading the rest of the file.
+
+Copyright and Usage Information
+===============================
+
+This file is Copyright (c) 2021 Caleb Sadler.
+"""
+from __future__ import annotations
+from typing import BinaryIO, Optional
+import mmap
+import struct
+import time
+import state
+from state import CubeState
+
+MAGIC = b'CUBEREC1'
+
+# The number of moves between keyframes
+KEYFRAME_INTERVAL = 256
+
+# magic, then the number of moves between keyframes
+HEADER = struct.Struct('<8sH')
+
+# marker, milliseconds since recording started, permutation, twist
+KEYFRAME = struct.Struct('<BIHH')
+
+# axis, milliseconds since recording started
+MOVE = struct.Struct('<BI')
+
+_KEYFRAME_MARKER = 255
+
+
+class Recorder:
+    """A recording of moves that is being written to a file
+
+    Instance Attributes
+        - moves: the number of moves recorded so far
+    """
+    # Private Instance Attributes:
+    #     - _file: the file the recording is written to
+    #     - _interval: the number of moves between keyframes
+    #     - _state: the state of the cube after the moves recorded so far
+    #     - _start: the time the recording started
+    moves: int
+    _file: Optional[BinaryIO]
+    _interval: int
+    _state: CubeState
+    _start: float
+
+    def __init__(self, path: str, start_state: CubeState,
+                 interval: int = KEYFRAME_INTERVAL) -> None:
+        """Start a new recording at path of a cube in start_state"""
+        self.moves = 0
+        self._interval = interval
+        self._state = start_state
+        self._start = time.perf_counter()
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, interval))
+        self._write_keyframe()
+
+    def record(self, axis: int) -> None:
+        """Record a move around the given axis"""
+        if self.moves > 0 and self.moves % self._interval == 0:
+            self._write_keyframe()
+
+        self._file.write(MOVE.pack(axis, self._get_millis()))
+        self._state = self._state.apply(state.MOVES[axis])
+        self.moves += 1
+
+    def record_sequence(self, move_str: str) -> None:
+        """Record each move letter in order"""
+        for move in move_str:
+            self.record(state.MOVES.index(move))
+
+    def close(self) -> None:
+        """Finish the recording"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _get_millis(self) -> int:
+        """Return the milliseconds since the recording started"""
+        return int((time.perf_counter() - self._start) * 1000)
+
+    def _write_keyframe(self) -> None:
+        """Write the current state of the cube"""
+        self._file.write(KEYFRAME.pack(_KEYFRAME_MARKER, self._get_millis(),
+                                       self._state.perm, self._state.twist))
+
+
+class RecorderGroup:
+    """Several recorders, or anything else with record, record_sequence and close
+    methods, that are all told about the same moves
+
+    Instance Attributes
+        - recorders: the recorders in the group
+    """
+    recorders: list
+
+    def __init__(self, recorders: list) -> None:
+        """Initialize a new group of the given recorders"""
+        self.recorders = recorders
+
+    def record(self, axis: int) -> None:
+        """Record a move around the given axis in every recorder"""
+        for recorder in self.recorders:
+            recorder.record(axis)
+
+    def record_sequence(self, move_str: str) -> None:
+        """Record each move letter in order in every recorder"""
+        for recorder in self.recorders:
+            recorder.record_sequence(move_str)
+
+    def close(self) -> None:
+        """Finish every recorder"""
+        for recorder in self.recorders:
+            recorder.close()
+
+
+class Replay:
+    """A recording of moves that is being played back
+
+    Instance Attributes
+        - position: the number of moves played back so far
+    """
+    # Private Instance Attributes:
+    #     - _data: the memory-mapped recording
+    #     - _interval: the number of moves between keyframes
+    #     - _moves: the number of moves in the recording
+    position: int
+    _data: mmap.mmap
+    _interval: int
+    _moves: int
+
+    def __init__(self, path: str) -> None:
+        """Open the recording at path, starting at its first move"""
+        with open(path, 'rb') as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._data) < HEADER.size + KEYFRAME.size:
+            raise ValueError(f'{path} is too short to be a recording')
+
+        magic, self._interval = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a recording')
+
+        # a block that was cut off while it was being written only counts its whole moves
+        blocks, extra = divmod(len(self._data) - HEADER.size, self._get_block_size())
+        self._moves = blocks * self._interval + max(extra - KEYFRAME.size, 0) // MOVE.size
+        self.position = 0
+
+    def __len__(self) -> int:
+        """Return the number of moves in the recording"""
+        return self._moves
+
+    def seek(self, index: int) -> CubeState:
+        """Move to just after the first index moves, returning the state of the cube there
+
+        This reads one keyframe and fewer than KEYFRAME_INTERVAL moves.
+
+        Preconditions:
+            - 0 <= index <= len(self)
+        """
+        block = index // self._interval
+        if block > 0 and block * self._interval == self._moves:  # the keyframe is not written
+            block -= 1
+
+        _, _, perm, twist = KEYFRAME.unpack_from(self._data, self._get_keyframe_offset(block))
+        self.position = block * self._interval
+
+        return CubeState(perm, twist).apply_sequence(self.read(index - self.position))
+
+    def seek_time(self, millis: int) -> CubeState:
+        """Move to just after the moves made in the first millis milliseconds, returning
+        the state of the cube there"""
+        low = 0
+        high = self._moves
+
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_move(middle)[1] < millis:
+                low = middle + 1
+            else:
+                high = middle
+
+        return self.seek(low)
+
+    def read(self, count: int) -> str:
+        """Return the letters of up to the next count moves, and move past them"""
+        end = min(self.position + count, self._moves)
+        move_str = ''.join(state.MOVES[self._get_move(i)[0]] for i in range(self.position, end))
+        self.position = end
+
+        return move_str
+
+    def close(self) -> None:
+        """Close the recording"""
+        self._data.close()
+
+    def _get_move(self, index: int) -> tuple[int, int]:
+        """Return the axis and time in milliseconds of the move with the given index"""
+        block, offset = divmod(index, self._interval)
+        return MOVE.unpack_from(self._data, self._get_keyframe_offset(block) + KEYFRAME.size
+                                + offset * MOVE.size)
+
+    def _get_block_size(self) -> int:
+        """Return the number of bytes in each block of a keyframe and its moves"""
+        return KEYFRAME.size + self._interval * MOVE.size
+
+    def _get_keyframe_offset(self, block: int) -> int:
+        """Return where the keyframe of the given block starts"""
+        return HEADER.size + block * self._get_block_size()
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['__future__', 'typing', 'mmap', 'struct', 'time', 'state',
+                          'python_ta.contracts'],
+        'allowed-io': ['Recorder.__init__', 'Replay.__init__'],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
+
+    import python_ta.contracts
+
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
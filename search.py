@@ -0,0 +1,110 @@
+"""search
+
+Description
+===============================
+
+This Python module solves the 2 by 2 Rubik's cube without a
+precomputed table. It searches forwards from the scrambled cube and
+backwards from the solved cube at the same time until the two
+searches meet, giving a solution with the fewest quarter turns.
+
+Copyright and Usage Information
+===============================
+
+This file is Copyright (c) 2021 Caleb Sadler.
+"""
+from __future__ import annotations
+from typing import Optional
+import time
+import optimal
+import state
+from state import CubeState
+
+
+def solve(current: CubeState, budget: float = 0.25) -> Optional[str]:
+    """Return the shortest string of face turns that solves the given state
+
+    If the search takes longer than budget seconds, return the best solution
+    found so far, or None if the two searches have not met yet.
+    """
+    deadline = time.perf_counter() + budget
+    perm, twist = optimal.position(state.fix_last_corner(current))
+    start = perm * 729 + twist
+
+    if start == 0:
+        return ''
+
+    # moves from the scrambled cube to each position, and from each position to solved
+    forward = {start: ''}
+    backward = {0: ''}
+    forward_frontier = [start]
+    backward_frontier = [0]
+    best = None
+
+    while best is None:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, best = _expand(forward_frontier, forward, backward, True, deadline)
+        else:
+            backward_frontier, best = _expand(backward_frontier, backward, forward, False,
+                                              deadline)
+
+        if time.perf_counter() >= deadline:
+            break
+
+    return best
+
+
+def _expand(frontier: list[int], seen: dict[int, str], other: dict[int, str],
+            is_forward: bool, deadline: float) -> tuple[list[int], Optional[str]]:
+    """Expand one layer of a search, returning the next layer and the best solution found
+
+    The layer is cut short if the deadline passes.
+    """
+    perm_table, twist_table = optimal.face_tables()
+    new_frontier = []
+    best = None
+
+    for index in frontier:
+        if time.perf_counter() >= deadline:
+            break
+
+        perm, twist = divmod(index, 729)
+        for axis in range(0, len(optimal.FACE_MOVES)):
+            new_index = perm_table[axis][perm] * 729 + twist_table[axis][twist]
+            if new_index in seen:
+                continue
+
+            move = optimal.FACE_MOVES[axis]
+            if is_forward:
+                seen[new_index] = seen[index] + move
+            else:
+                seen[new_index] = state.INVERSES[move] + seen[index]
+            new_frontier.append(new_index)
+
+            if new_index in other:
+                if is_forward:
+                    solve_str = seen[new_index] + other[new_index]
+                else:
+                    solve_str = other[new_index] + seen[new_index]
+
+                if best is None or len(solve_str) < len(best):
+                    best = solve_str
+
+    return new_frontier, best
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['__future__', 'typing', 'time', 'optimal', 'state',
+                          'python_ta.contracts'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
+
+    import python_ta.contracts
+
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
@@ -0,0 +1,180 @@
+"""solvecache
+
+Description
+===============================
+
+This Python module remembers the solutions to positions that have
+already been solved, so solving them again is instant. The most
+recently used solutions are kept in memory, and every new solution
+is added to a file so they are remembered between runs.
+
+Solutions are kept by the canonical key of each position, so the same
+position held any way up is only solved and saved once, and the saved
+solution is relabelled to suit the way the cube is being held.
+
+Copyright and Usage Information
+===============================
+
+This file is Copyright (c) 2021 Caleb Sadler.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+import os
+import state
+from state import CubeState
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'solutions.cache')
+
+# The most solutions kept at once
+MAX_SIZE = 10000
+
+# The first line of a cache file, which changes whenever the meaning of the lines does
+HEADER = 'solutions 2'
+
+
+class SolutionCache:
+    """A cache from positions of the cube to their solutions
+
+    When the cache is full, the least recently used solution is forgotten.
+
+    Instance Attributes
+        - max_size: the most solutions kept at once
+        - hits: the number of lookups that found a solution
+        - misses: the number of lookups that did not
+    """
+    # Private Instance Attributes:
+    #     - _path: the file solutions are saved to, or None to keep them in memory only
+    #     - _solutions: the solution of the representative state of each canonical key,
+    #           from least to most recently used
+    #     - _lines: the number of lines in the file at _path, or 0 if it has no header
+    max_size: int
+    hits: int
+    misses: int
+    _path: Optional[str]
+    _solutions: OrderedDict[int, str]
+    _lines: int
+
+    def __init__(self, path: Optional[str] = CACHE_PATH, max_size: int = MAX_SIZE) -> None:
+        """Initialize a new cache, loading any solutions saved at path"""
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._path = path
+        self._solutions = OrderedDict()
+        self._lines = 0
+
+        if path is not None and os.path.isfile(path):
+            self._load()
+
+    def __len__(self) -> int:
+        """Return the number of solutions in the cache"""
+        return len(self._solutions)
+
+    def get(self, current: CubeState) -> Optional[str]:
+        """Return the saved solution of the given state, or None if there is none"""
+        index, orientation = state.canonical_rotation(current)
+        solve_str = self._solutions.get(index)
+
+        if solve_str is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._solutions.move_to_end(index)
+        return state.relabel_moves(solve_str, orientation)
+
+    def put(self, current: CubeState, solve_str: str) -> None:
+        """Save the solution of the given state"""
+        index, orientation = state.canonical_rotation(current)
+        solve_str = state.relabel_moves(solve_str, state.invert(orientation))
+        self._add(index, solve_str)
+
+        if self._path is None:
+            return
+
+        # the file is rewritten when it has no header yet, and without forgotten
+        # solutions once it gets too long
+        if self._lines == 0 or self._lines >= 2 * self.max_size:
+            self.save()
+        else:
+            try:
+                with open(self._path, 'a') as file:
+                    file.write(f'{index} {solve_str}\n')
+                self._lines += 1
+            except OSError:  # the cache still works without being saved
+                pass
+
+    def save(self) -> None:
+        """Rewrite the file with only the solutions in the cache"""
+        if self._path is None:
+            return
+
+        try:
+            temp_path = self._path + '.tmp'
+            with open(temp_path, 'w') as file:
+                file.write(HEADER + '\n')
+                for index, solve_str in self._solutions.items():
+                    file.write(f'{index} {solve_str}\n')
+            os.replace(temp_path, self._path)
+            self._lines = len(self._solutions) + 1
+        except OSError:  # the cache still works without being saved
+            pass
+
+    def _add(self, index: int, solve_str: str) -> None:
+        """Add a solution as the most recently used, forgetting the least recently used
+        if the cache is full"""
+        self._solutions[index] = solve_str
+        self._solutions.move_to_end(index)
+
+        if len(self._solutions) > self.max_size:
+            self._solutions.popitem(last=False)
+
+    def _load(self) -> None:
+        """Load the solutions saved in the file, skipping any lines that cannot be read
+
+        A file saved by another version is ignored, and replaced the next time a
+        solution is saved.
+        """
+        try:
+            with open(self._path) as file:
+                if file.readline().rstrip('\n') != HEADER:
+                    return
+
+                self._lines = 1
+                for line in file:
+                    self._lines += 1
+                    parts = line.split()
+                    if len(parts) == 1:
+                        parts.append('')
+
+                    if len(parts) == 2 and parts[0].isdigit() \
+                            and int(parts[0]) < state.NUM_POSITIONS \
+                            and all(move in state.MOVES for move in parts[1]):
+                        self._add(int(parts[0]), parts[1])
+        except OSError:
+            pass
+
+
+@lru_cache(maxsize=None)
+def get_cache() -> SolutionCache:
+    """Return the cache shared by the whole program, loading it only the first time"""
+    return SolutionCache()
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['__future__', 'collections', 'functools', 'typing', 'os', 'state',
+                          'python_ta.contracts'],
+        'allowed-io': ['SolutionCache.put', 'SolutionCache.save', 'SolutionCache._load'],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
+
+    import python_ta.contracts
+
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
@@ -0,0 +1,538 @@
+"""state
+
+Description
+===============================
+
+This Python module is a compact representation of the logical
+state of a 2 by 2 Rubik's cube. A state only records which corner
+sits in each slot and how it is twisted, so moves can be applied
+with table lookups and without any of the geometry in cube.py.
+
+Copyright and Usage Information
+===============================
+
+This file is Copyright (c) 2021 Caleb Sadler.
+"""
+from __future__ import annotations
+from array import array
+from itertools import permutations, product
+from operator import itemgetter
+from typing import Iterable, Optional, Tuple
+
+# The move letters, in the order of the axes used by the Cube
+MOVES = 'ntvjyflr'
+
+# The move letter that undoes each move letter
+INVERSES = {
+    'n': 'j',
+    't': 'y',
+    'v': 'f',
+    'j': 'n',
+    'y': 't',
+    'f': 'v',
+    'l': 'r',
+    'r': 'l'
+}
+
+# The colours of each corner in the solved cube, in slot order
+SOLVED_COLOURS = [
+    [(255, 255, 255), (255, 0, 0), (0, 204, 0)],
+    [(255, 255, 255), (0, 102, 204), (255, 0, 0)],
+    [(255, 255, 0), (255, 0, 0), (0, 102, 204)],
+    [(255, 255, 0), (0, 204, 0), (255, 0, 0)],
+    [(255, 255, 255), (0, 204, 0), (255, 128, 0)],
+    [(255, 255, 255), (255, 128, 0), (0, 102, 204)],
+    [(255, 255, 0), (0, 102, 204), (255, 128, 0)],
+    [(255, 255, 0), (255, 128, 0), (0, 204, 0)]
+]
+
+NUM_PERMS = 40320
+NUM_TWISTS = 6561
+
+# The number of positions of the cube, not counting which way it faces
+NUM_POSITIONS = 5040 * 729
+
+# For each axis, the slot each slot takes its corner from
+MOVE_SOURCES = [
+    (1, 2, 3, 0, 4, 5, 6, 7),
+    (0, 2, 6, 3, 4, 1, 5, 7),
+    (1, 5, 2, 3, 0, 4, 6, 7),
+    (3, 0, 1, 2, 4, 5, 6, 7),
+    (0, 5, 1, 3, 4, 6, 2, 7),
+    (4, 0, 2, 3, 5, 1, 6, 7),
+    (3, 2, 6, 7, 0, 1, 5, 4),
+    (4, 5, 1, 0, 7, 6, 2, 3)
+]
+
+# For each axis, the twist added to the corner that lands in each slot
+MOVE_TWISTS = [
+    (2, 1, 2, 1, 0, 0, 0, 0),
+    (0, 2, 1, 0, 0, 1, 2, 0),
+    (0, 0, 0, 0, 0, 0, 0, 0),
+    (2, 1, 2, 1, 0, 0, 0, 0),
+    (0, 2, 1, 0, 0, 1, 2, 0),
+    (0, 0, 0, 0, 0, 0, 0, 0),
+    (1, 2, 1, 2, 2, 1, 2, 1),
+    (1, 2, 1, 2, 2, 1, 2, 1)
+]
+
+# Whole cube rotations that, together, reach every orientation of the cube
+_ROTATIONS = ['l', 'vllfll']
+
+_AXES = {MOVES[i]: i for i in range(0, len(MOVES))}
+
+# The move letters that turn clockwise, one for each axis that can be turned around
+_CLOCKWISE = 'ntvl'
+
+_PERM_TABLE: Optional[list[array]] = None
+_TWIST_TABLE: Optional[list[array]] = None
+
+# The shortest move letters that turn the solved cube to each of its orientations
+_ORIENTATION_MOVES: Optional[dict[CubeState, str]] = None
+
+# For each orientation and face turn, the face turn and orientation that have the same
+# effect when done in the other order
+_RELABEL: Optional[dict[Tuple[CubeState, str], Tuple[str, CubeState]]] = None
+
+
+class CubeState:
+    """The logical state of a 2 by 2 Rubik's cube
+
+    States are hashable, so they can be used as keys, and should not be mutated.
+
+    Instance Attributes
+        - perm: the rank of the corner permutation, where corner
+            perm[i] sits in slot i
+        - twist: the twists of the corners in each slot, in base 3
+    """
+    __slots__ = ('perm', 'twist')
+    perm: int
+    twist: int
+
+    def __init__(self, perm: int = 0, twist: int = 0) -> None:
+        """Initialize a new state, solved by default"""
+        self.perm = perm
+        self.twist = twist
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether the two states are the same"""
+        return isinstance(other, CubeState) and self.perm == other.perm \
+            and self.twist == other.twist
+
+    def __hash__(self) -> int:
+        """Return the hash of this state"""
+        return self.perm * NUM_TWISTS + self.twist
+
+    def __repr__(self) -> str:
+        """Return a string representation of this state"""
+        return f'CubeState({self.perm}, {self.twist})'
+
+    def apply(self, move: str) -> CubeState:
+        """Return the state after applying the given move letter"""
+        if _PERM_TABLE is None:
+            _build_tables()
+
+        axis = _AXES[move]
+        return CubeState(_PERM_TABLE[axis][self.perm], _TWIST_TABLE[axis][self.twist])
+
+    def apply_sequence(self, moves: str) -> CubeState:
+        """Return the state after applying each move letter in order"""
+        if _PERM_TABLE is None:
+            _build_tables()
+
+        perm = self.perm
+        twist = self.twist
+        for move in moves:
+            axis = _AXES[move]
+            perm = _PERM_TABLE[axis][perm]
+            twist = _TWIST_TABLE[axis][twist]
+
+        return CubeState(perm, twist)
+
+    def corners(self) -> Tuple[list[int], list[int]]:
+        """Return the corner in each slot and the twist of each slot"""
+        return unrank_permutation(self.perm), decode_twist(self.twist)
+
+    def is_solved(self) -> bool:
+        """Return whether the cube is solved in any orientation"""
+        return self in _SOLVED_STATES
+
+
+def from_corners(pieces: list[int], twists: list[int]) -> CubeState:
+    """Return the state with the given corner and twist in each slot"""
+    return CubeState(rank_permutation(pieces), encode_twist(twists))
+
+
+def fix_last_corner(current: CubeState) -> CubeState:
+    """Return the same position seen from the orientation where the last slot is solved
+
+    The face turns never move the last slot, so any face turns that solve the
+    returned state will also solve the given state.
+    """
+    return from_corners(*_fix_corners(*current.corners()))
+
+
+def simplify_moves(moves: str, keep_orientation: bool = True) -> str:
+    """Return a string of move letters with the same effect as moves, but no wasted turns
+
+    Whole cube rotations are removed by relabelling the face turns after them,
+    turns that undo each other are cancelled, and repeated turns of the same face
+    are merged. If keep_orientation is True, the rotations needed to leave the cube
+    facing the same way are added at the end, unless only merging the turns as they
+    are is shorter. Otherwise the cube may end up facing another way, which does not
+    matter for scrambles or for solving.
+    """
+    if _RELABEL is None:
+        _build_simplify_tables()
+
+    face_turns, orientation = _relabel(moves, SOLVED)
+    simplified = merge_turns(face_turns)
+
+    if not keep_orientation:
+        return simplified
+
+    simplified += _ORIENTATION_MOVES[orientation]
+    merged = merge_turns(moves)
+
+    return simplified if len(simplified) < len(merged) else merged
+
+
+def merge_turns(moves: Iterable[str]) -> str:
+    """Return the move letters with turns that undo each other cancelled, and repeated
+    turns around the same axis merged into the fewest quarter turns"""
+    # each axis turned so far and how many quarter turns clockwise, with no axis twice in a row
+    turns = []
+
+    for move in moves:
+        axis = _AXES[move] if move in _CLOCKWISE else _AXES[INVERSES[move]]
+        quarters = 1 if move in _CLOCKWISE else 3
+
+        if turns != [] and turns[-1][0] == axis:
+            turns[-1][1] = (turns[-1][1] + quarters) % 4
+            if turns[-1][1] == 0:
+                turns.pop()
+        else:
+            turns.append([axis, quarters])
+
+    return ''.join(MOVES[axis] * quarters if quarters < 3 else INVERSES[MOVES[axis]]
+                   for axis, quarters in turns)
+
+
+def rank_position(current: CubeState) -> int:
+    """Return the index in range(NUM_POSITIONS) of the position of the given state
+
+    States that only differ by turning the whole cube before any other moves have the
+    same index, since the same face turns solve them.
+    """
+    pieces, twists = _fix_corners(*current.corners())
+    return rank_permutation(pieces[:7]) * 729 + encode_twist(twists[:6])
+
+
+def unrank_position(index: int) -> CubeState:
+    """Return the state with the last slot solved that has the given position index
+
+    Preconditions:
+        - 0 <= index < NUM_POSITIONS
+    """
+    perm, twist = divmod(index, 729)
+    twists = decode_twist(twist, 6)
+
+    # the twists of all the corners always add up to a multiple of 3
+    return from_corners(unrank_permutation(perm, 7) + [7], twists + [(-sum(twists)) % 3, 0])
+
+
+def compose(first: CubeState, second: CubeState) -> CubeState:
+    """Return the state reached by making the moves that reach first from the solved
+    cube, then the moves that reach second"""
+    pieces, twists = first.corners()
+    sources, added = second.corners()
+    return from_corners([pieces[source] for source in sources],
+                        [(twists[source] + twist) % 3 for source, twist in zip(sources, added)])
+
+
+def invert(current: CubeState) -> CubeState:
+    """Return the state reached by undoing the moves that reach current, in reverse order"""
+    pieces, twists = current.corners()
+    new_pieces = [0] * 8
+    new_twists = [0] * 8
+    for i in range(0, 8):
+        new_pieces[pieces[i]] = i
+        new_twists[pieces[i]] = (-twists[i]) % 3
+
+    return from_corners(new_pieces, new_twists)
+
+
+def reflect(current: CubeState) -> CubeState:
+    """Return the mirror image of the state in the plane between the left and right halves
+
+    The mirror image of a position is as far from solved as the position itself.
+    """
+    pieces, twists = current.corners()
+    new_pieces = [0] * 8
+    new_twists = [0] * 8
+
+    # slot i and slot i ^ 4 are mirror images, and mirroring reverses the order of the colours
+    for i in range(0, 8):
+        new_pieces[i ^ 4] = pieces[i] ^ 4
+        new_twists[i ^ 4] = (-twists[i]) % 3
+
+    return from_corners(new_pieces, new_twists)
+
+
+def canonical_rotation(current: CubeState) -> Tuple[int, CubeState]:
+    """Return the smallest position index of the state after turning the whole cube to
+    each orientation, and the orientation that gives it
+
+    Since rank_position already ignores turning the whole cube before the moves, every
+    state of the same position held any way up has the same index.
+    """
+    pieces, twists = current.corners()
+    best = None
+
+    # the same as rank_position(compose(current, orientation)), without building each state
+    for orientation, sources, added in _ORIENTATION_CORNERS:
+        fixed_pieces, fixed_twists = _fix_corners(
+            [pieces[source] for source in sources],
+            [(twists[source] + twist) % 3 for source, twist in zip(sources, added)])
+        index = rank_permutation(fixed_pieces[:7]) * 729 + encode_twist(fixed_twists[:6])
+        if best is None or index < best[0]:
+            best = (index, orientation)
+
+    return best
+
+
+def canonical_key(current: CubeState, mirror: bool = False, inverse: bool = False) -> int:
+    """Return the same number for every state that is the same position under a symmetry
+
+    The symmetries are turning the whole cube, and also mirroring the cube if mirror is
+    True and undoing the moves if inverse is True. Positions with the same key are the
+    same distance from solved, so two states can be compared by comparing their keys.
+    """
+    candidates = [current]
+    if inverse:
+        candidates.append(invert(current))
+    if mirror:
+        candidates.extend([reflect(candidate) for candidate in candidates])
+
+    return min(canonical_rotation(candidate)[0] for candidate in candidates)
+
+
+def relabel_moves(moves: str, orientation: CubeState) -> str:
+    """Return face turns that have the same effect as turning the whole cube to the given
+    orientation, then making moves, apart from which way the cube ends up facing
+
+    Preconditions:
+        - orientation.is_solved()
+    """
+    return ''.join(_relabel(moves, orientation)[0])
+
+
+def rank_permutation(pieces: list[int]) -> int:
+    """Return the lexicographic rank of the given permutation of range(len(pieces))"""
+    rank = 0
+    for i in range(0, len(pieces)):
+        smaller = 0
+        for j in range(i + 1, len(pieces)):
+            if pieces[j] < pieces[i]:
+                smaller += 1
+        rank = rank * (len(pieces) - i) + smaller
+
+    return rank
+
+
+def unrank_permutation(rank: int, size: int = 8) -> list[int]:
+    """Return the permutation of range(size) with the given lexicographic rank"""
+    digits = []
+    for base in range(1, size + 1):
+        digits.append(rank % base)
+        rank //= base
+
+    remaining = list(range(0, size))
+    return [remaining.pop(digit) for digit in reversed(digits)]
+
+
+def encode_twist(twists: list[int]) -> int:
+    """Return the base 3 encoding of the twist in each slot"""
+    value = 0
+    for twist in twists:
+        value = value * 3 + twist
+
+    return value
+
+
+def decode_twist(value: int, size: int = 8) -> list[int]:
+    """Return the twist in each of the first size slots given its base 3 encoding"""
+    twists = [0] * size
+    for i in range(size - 1, -1, -1):
+        twists[i] = value % 3
+        value //= 3
+
+    return twists
+
+
+def move_tables() -> Tuple[list[array], list[array]]:
+    """Return the permutation and twist move tables, building them if needed
+
+    perm_table[axis][perm] is the permutation rank after moving around axis,
+    and likewise for twist_table.
+    """
+    if _PERM_TABLE is None:
+        _build_tables()
+
+    return _PERM_TABLE, _TWIST_TABLE
+
+
+def _build_tables() -> None:
+    """Build the move tables for every axis"""
+    global _PERM_TABLE, _TWIST_TABLE
+
+    perms = list(permutations(range(0, 8)))
+    perm_index = {perms[i]: i for i in range(0, len(perms))}
+    twists = list(product(range(0, 3), repeat=8))
+    twist_index = {twists[i]: i for i in range(0, len(twists))}
+
+    perm_table = []
+    twist_table = []
+
+    for axis in range(0, len(MOVES)):
+        get_sources = itemgetter(*MOVE_SOURCES[axis])
+        added = MOVE_TWISTS[axis]
+        perm_table.append(array('H', [perm_index[get_sources(p)] for p in perms]))
+        twist_table.append(array('H', [
+            twist_index[tuple((t + d) % 3 for t, d in zip(get_sources(twist), added))]
+            for twist in twists
+        ]))
+
+    _PERM_TABLE = perm_table
+    _TWIST_TABLE = twist_table
+
+
+def _build_simplify_tables() -> None:
+    """Build the tables used by simplify_moves"""
+    global _ORIENTATION_MOVES, _RELABEL
+
+    # search outwards from the solved cube until every orientation has been reached
+    orientation_moves = {SOLVED: ''}
+    seen = {SOLVED}
+    layer = [(SOLVED, '')]
+
+    while len(orientation_moves) < len(_SOLVED_STATES):
+        new_layer = []
+        for current, moves in layer:
+            for move in MOVES:
+                new_state = current.apply(move)
+                if new_state not in seen:
+                    seen.add(new_state)
+                    new_layer.append((new_state, moves + move))
+                    if new_state in _SOLVED_STATES:
+                        orientation_moves[new_state] = moves + move
+        layer = new_layer
+
+    # every face turn followed by every orientation
+    turned = {}
+    for new_move in MOVES[:6]:
+        for new_orientation, rotation in orientation_moves.items():
+            turned[SOLVED.apply(new_move).apply_sequence(rotation)] = (new_move, new_orientation)
+
+    relabel = {}
+    for orientation in orientation_moves:
+        for move in MOVES[:6]:
+            relabel[orientation, move] = turned[orientation.apply(move)]
+
+    _ORIENTATION_MOVES = orientation_moves
+    _RELABEL = relabel
+
+
+def _fix_corners(pieces: list[int], twists: list[int]) -> Tuple[list[int], list[int]]:
+    """Return the corners and twists of fix_last_corner, given those of the state"""
+    fix = _LAST_CORNER_FIXES.get((pieces[7], twists[7]))
+    if fix is None:
+        raise ValueError('the state is not a legal position of the cube')
+
+    slot_of, solved_twists = fix
+    return ([slot_of[piece] for piece in pieces],
+            [(twists[i] - solved_twists[slot_of[pieces[i]]]) % 3 for i in range(0, 8)])
+
+
+def _relabel(moves: str, orientation: CubeState) -> Tuple[list[str], CubeState]:
+    """Return the face turns of relabel_moves, and the orientation the cube ends up in"""
+    if _RELABEL is None:
+        _build_simplify_tables()
+
+    face_turns = []
+    for move in moves:
+        if move == 'l' or move == 'r':
+            orientation = orientation.apply(move)
+        else:
+            move, orientation = _RELABEL[orientation, move]
+            face_turns.append(move)
+
+    return face_turns, orientation
+
+
+def _apply_slow(pieces: list[int], twists: list[int], axis: int) \
+        -> Tuple[list[int], list[int]]:
+    """Return the corners and twists after a move without using the move tables"""
+    sources = MOVE_SOURCES[axis]
+    return ([pieces[sources[i]] for i in range(0, 8)],
+            [(twists[sources[i]] + MOVE_TWISTS[axis][i]) % 3 for i in range(0, 8)])
+
+
+def _find_solved_states() -> frozenset[CubeState]:
+    """Return the solved state in each of the 24 orientations of the cube"""
+    found = {(tuple(range(0, 8)), (0,) * 8)}
+    to_visit = list(found)
+
+    while to_visit != []:
+        pieces, twists = to_visit.pop()
+        for rotation in _ROTATIONS:
+            new_pieces, new_twists = list(pieces), list(twists)
+            for move in rotation:
+                new_pieces, new_twists = _apply_slow(new_pieces, new_twists, _AXES[move])
+
+            key = (tuple(new_pieces), tuple(new_twists))
+            if key not in found:
+                found.add(key)
+                to_visit.append(key)
+
+    return frozenset(from_corners(list(pieces), list(twists)) for pieces, twists in found)
+
+
+def _find_last_corner_fixes() -> dict[Tuple[int, int], Tuple[list[int], list[int]]]:
+    """Return, for the corner and twist in the last slot, the slot of each corner and the
+    twists of the orientation that has them there"""
+    fixes = {}
+    for solved_state in _SOLVED_STATES:
+        solved_pieces, solved_twists = solved_state.corners()
+        slot_of = [0] * 8
+        for i in range(0, 8):
+            slot_of[solved_pieces[i]] = i
+
+        fixes[solved_pieces[7], solved_twists[7]] = (slot_of, solved_twists)
+
+    return fixes
+
+
+SOLVED = CubeState()
+_SOLVED_STATES = _find_solved_states()
+_LAST_CORNER_FIXES = _find_last_corner_fixes()
+
+# Each orientation of the cube, with its corners and twists
+_ORIENTATION_CORNERS = [(orientation, *orientation.corners()) for orientation in _SOLVED_STATES]
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['__future__', 'array', 'itertools', 'operator', 'typing',
+                          'python_ta.contracts'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
+
+    import python_ta.contracts
+
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
@@ -0,0 +1,160 @@
+"""timing
+
+Description
+===============================
+
+This Python module measures how long each part of a frame takes.
+The simulation can show the measurements on the screen, along with
+the frame rate, and write every frame's measurements to a CSV file.
+
+Copyright and Usage Information
+===============================
+
+This file is Copyright (c) 2021 Caleb Sadler.
+"""
+from __future__ import annotations
+from collections import deque
+from functools import lru_cache
+from typing import Optional, TextIO
+import csv
+import time
+import pygame
+
+# The parts of a frame that are timed, in the order they happen
+PHASES = ['input', 'rotation', 'visualize', 'overlay', 'display', 'events']
+
+# The phases of a frame of the grid, which has no input or overlay to time
+GRID_PHASES = ['rotation', 'visualize', 'display', 'events']
+
+# Where the measurements are drawn on the screen
+HUD_POS = (10, 440)
+
+
+@lru_cache(maxsize=None)
+def get_font() -> pygame.font.Font:
+    """Return the font used for the measurements, looking it up only the first time"""
+    return pygame.font.SysFont('inconsolata', 18)
+
+
+class FrameTimer:
+    """A record of how long each phase of the recent frames took
+
+    Instance Attributes
+        - frames: the number of frames timed so far
+        - phases: the phases of each frame, in the order they happen
+    """
+    # Private Instance Attributes:
+    #     - _window: the number of recent frames that averages are taken over
+    #     - _last: the time of the latest mark
+    #     - _frame: the seconds spent in each phase of the current frame
+    #     - _starts: the start time of each recent frame
+    #     - _recent: the seconds spent in each phase of each recent frame
+    #     - _file: the CSV file each frame is written to, if any
+    #     - _writer: the CSV writer for _file
+    frames: int
+    phases: list[str]
+    _window: int
+    _last: float
+    _frame: dict[str, float]
+    _starts: deque
+    _recent: deque
+    _file: Optional[TextIO]
+    _writer: Optional[csv.writer]
+
+    def __init__(self, csv_path: Optional[str] = None, window: int = 60,
+                 phases: Optional[list[str]] = None) -> None:
+        """Initialize a new timer for the given phases, or PHASES if they are not given,
+        writing each frame to csv_path if it is given"""
+        self.frames = 0
+        self.phases = PHASES if phases is None else phases
+        self._window = window
+        self._last = time.perf_counter()
+        self._frame = dict.fromkeys(self.phases, 0.0)
+        self._starts = deque(maxlen=window)
+        self._recent = deque(maxlen=window)
+        self._file = None
+        self._writer = None
+
+        if csv_path is not None:
+            self._file = open(csv_path, 'w', newline='')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(['frame', 'start']
+                                  + [phase + '_ms' for phase in self.phases])
+
+    def start_frame(self) -> None:
+        """Start timing a new frame"""
+        self._last = time.perf_counter()
+        self._starts.append(self._last)
+
+    def mark(self, phase: str) -> None:
+        """Count the time since the last mark as spent in the given phase"""
+        now = time.perf_counter()
+        self._frame[phase] += now - self._last
+        self._last = now
+
+    def end_frame(self) -> None:
+        """Finish timing the current frame, and write it to the CSV file"""
+        if self._writer is not None:
+            self._writer.writerow([self.frames, f'{self._starts[-1]:.6f}']
+                                  + [f'{self._frame[phase] * 1000:.4f}'
+                                     for phase in self.phases])
+
+        self._recent.append(self._frame)
+        self._frame = dict.fromkeys(self.phases, 0.0)
+        self.frames += 1
+
+    def get_fps(self) -> float:
+        """Return the number of frames per second over the recent frames"""
+        if len(self._starts) < 2 or self._starts[-1] == self._starts[0]:
+            return 0.0
+
+        return (len(self._starts) - 1) / (self._starts[-1] - self._starts[0])
+
+    def get_averages(self) -> dict[str, float]:
+        """Return the average milliseconds spent in each phase over the recent frames"""
+        if len(self._recent) == 0:
+            return dict.fromkeys(self.phases, 0.0)
+
+        return {phase: sum(frame[phase] for frame in self._recent) / len(self._recent) * 1000
+                for phase in self.phases}
+
+    def draw_hud(self, screen: pygame.Surface) -> None:
+        """Draw the frame rate and the time spent in each phase, and update that area"""
+        lines = [f'{self.get_fps():6.1f} fps']
+        lines.extend(f'{phase:<10}{millis:7.2f} ms'
+                     for phase, millis in self.get_averages().items())
+
+        font = get_font()
+        height = font.get_linesize()
+        rect = pygame.Rect(HUD_POS, (170, height * len(lines) + 10))
+
+        pygame.draw.rect(screen, (0, 0, 0), rect, 0)
+        for i in range(0, len(lines)):
+            text = font.render(lines[i], True, (255, 255, 255))
+            screen.blit(text, (rect.x + 5, rect.y + 5 + i * height))
+
+        pygame.display.update(rect)
+
+    def close(self) -> None:
+        """Close the CSV file, if there is one"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['__future__', 'collections', 'functools', 'typing', 'csv', 'time',
+                          'pygame', 'python_ta.contracts'],
+        'allowed-io': ['FrameTimer.__init__'],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
+
+    import python_ta.contracts
+
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()